@@ -1,17 +1,1358 @@
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, StringVar, IntVar
 import os
 import re
+import csv
+import math
+import pickle
+import zipfile
+import hashlib
+import importlib.util
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from openpyxl import Workbook, load_workbook
+# calamine lets pd.read_excel use its much faster engine; None is pandas' default engine (openpyxl)
+XLSX_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv # Multithreaded CSV reader into Arrow string columns
+    import pyarrow.compute as pc # Vectorized substring search over a search column's distinct values
+except ImportError:
+    pa = None # CSV and TXT files are parsed with pandas' C parser
 
 # Constants for chunk size and display limits
 CHUNKSIZE = 50000
+# Rough ratio between a file's size on disk and its size once loaded as str columns
+IN_MEMORY_EXPANSION = 6
+# Bookkeeping columns added to rows written to disk-backed comparison spill files
+SPILL_POS_COL = "__row_position__"
+SPILL_KEEP_COL = "__search_keep__"
+# Data rows per sheet when streaming results to xlsx (Excel's limit minus the header row)
+EXCEL_MAX_DATA_ROWS = 1048575
+# Key columns shorter than this are encoded in the parent process even in parallel mode
+PARALLEL_MIN_ROWS = 200000
+# Largest number of matching pairs kept in a JoinCache for re-filtering (16 bytes each)
+MAX_CACHED_PAIRS = 5000000
+# Search-filter masks kept by SearchFilterCache for repeated searches
+MAX_CACHED_FILTER_MASKS = 16
+# Largest total size of the key indexes kept by KeyIndexCache
+KEY_INDEX_CACHE_MAX_BYTES = 1024 ** 3
+# Largest total size of the Parquet sidecar copies kept by SidecarCache
+SIDECAR_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Strings read as missing values, the same as pd.read_csv's defaults
+CSV_NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+                 "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
 # Removed MAX_PREVIEW and MAX_DISPLAY as they will now be user-configurable or derived
 
 def normalize_colname(name):
     """Normalizes column names by stripping whitespace and converting to lowercase."""
     return re.sub(r"\s+", " ", str(name).strip()).lower()
 
+def key_column_values(df, col):
+    """
+    Returns the key values of one mapped column: stripped strings with NaN as '',
+    matching the old row-by-row key building. A mapped column that is missing
+    from df contributes '' for every row.
+    """
+    if col in df.columns:
+        return df[col].fillna('').astype(str).str.strip().to_numpy(dtype=object)
+    return np.full(len(df), '', dtype=object)
+
+def build_key_frame(df, key_columns):
+    """Builds the composite-key columns (key_0, key_1, ...) for df column-wise."""
+    data = {f"key_{i}": key_column_values(df, col) for i, col in enumerate(key_columns)}
+    return pd.DataFrame(data, index=pd.RangeIndex(len(df)))
+
+class ComparisonResult:
+    """
+    Outcome of a comparison as positional index arrays into File 1 and File 2.
+    left/right hold the paired positions of matched rows; left_only/right_only
+    hold the File 1 Only and File 2 Only rows.
+    """
+    def __init__(self, left, right, left_only, right_only):
+        self.left = np.asarray(left, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.left_only = np.asarray(left_only, dtype=np.int64)
+        self.right_only = np.asarray(right_only, dtype=np.int64)
+        # Compared column pairs of the matched rows; their differences are computed for
+        # the displayed rows only, see compute_diff_bits
+        self.diff_pairs = []
+
+    @property
+    def match_count(self):
+        return len(self.left)
+
+    @property
+    def nonmatch_count(self):
+        return len(self.left_only) + len(self.right_only)
+
+    def display_order(self, show_matches=True, show_nonmatches=True):
+        """
+        Returns (pos1, pos2, is_match, match_index) arrays in the order the results
+        grid lists rows: matches and File 1 Only rows in File 1 order, followed by
+        File 2 Only rows. A position of -1 marks the missing side of an unmatched
+        row; match_index points into left/right for matches and
+        is -1 otherwise.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        m1, m2 = (self.left, self.right) if show_matches else (empty, empty)
+        o1 = self.left_only if show_nonmatches else empty
+        o2 = self.right_only if show_nonmatches else empty
+        pos1 = np.concatenate([m1, o1])
+        pos2 = np.concatenate([m2, np.full(len(o1), -1, dtype=np.int64)])
+        match_index = np.concatenate([np.arange(len(m1)), np.full(len(o1), -1, dtype=np.int64)])
+        order = np.argsort(pos1, kind="stable")
+        pos1 = np.concatenate([pos1[order], np.full(len(o2), -1, dtype=np.int64)])
+        pos2 = np.concatenate([pos2[order], o2])
+        match_index = np.concatenate([match_index[order], np.full(len(o2), -1, dtype=np.int64)])
+        return pos1, pos2, match_index >= 0, match_index
+
+def compare_frames(df1, df2, mapping_keys, count_option=1, mask1=None, mask2=None, codes=None):
+    """
+    Compares df1 and df2 on the composite key given by mapping_keys (a list of
+    (File 1 column, File 2 column) pairs) and returns a ComparisonResult. The
+    composite keys are encoded to one int64 per row (see encode_mapping_keys),
+    so the join never builds per-row key tuples or strings; codes may pass in
+    an already encoded (codes1, codes2) pair.
+
+    mask1/mask2 are optional boolean arrays restricting each side to the rows
+    that pass the search filter. count_option follows the "Match Counting"
+    radio buttons: 1 keeps every matching pair, 2 keeps the first File 2 match
+    of each File 1 row, 3 pairs each File 2 row with the first File 1 row that
+    matches it. A File 1 row whose key exists in File 2 but whose partners are
+    all filtered out is neither a match nor File 1 Only, as before.
+    """
+    codes1, codes2 = codes if codes is not None else encode_mapping_keys(df1, df2, mapping_keys)
+    keep1 = None if mask1 is None else np.asarray(mask1, dtype=bool)
+    keep2 = None if mask2 is None else np.asarray(mask2, dtype=bool)
+    return ComparisonResult(*join_key_codes(codes1, codes2, count_option, keep1, keep2))
+
+def column_key_index(df, col):
+    """Factorizes one key column of df: returns (codes, distinct key values)."""
+    codes, uniques = pd.factorize(key_column_values(df, col))
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+def _shared_column_codes(index1, index2):
+    """
+    Translates two per-file column indexes (from column_key_index) into one
+    code space: File 2 keeps its codes and values only found in File 1 are
+    numbered after them. Returns (codes1, codes2, cardinality).
+    """
+    codes1, uniques1 = index1
+    codes2, uniques2 = index2
+    lookup = pd.Index(uniques2).get_indexer(uniques1)
+    new = lookup < 0
+    lookup[new] = len(uniques2) + np.arange(int(new.sum()))
+    return lookup[codes1], np.asarray(codes2, dtype=np.int64), len(uniques2) + int(new.sum())
+
+def _combine_key_columns(column_codes, n1):
+    """
+    Folds the (codes1, codes2, cardinality) of each key column into one int64
+    code per row, mixed-radix style. When the radix product would overflow
+    int64 the codes combined so far are compacted to dense codes first.
+    Returns the File 1 and File 2 code arrays.
+    """
+    codes = None
+    size = 1
+    for codes1, codes2, cardinality in column_codes:
+        column = np.concatenate([codes1, codes2]).astype(np.int64)
+        cardinality = max(cardinality, 1)
+        if codes is None:
+            codes, size = column, cardinality
+            continue
+        if size * cardinality >= 2 ** 63:
+            codes, dense = pd.factorize(codes)
+            codes, size = codes.astype(np.int64), len(dense)
+        codes = codes * cardinality + column
+        size *= cardinality
+    return codes[:n1], codes[n1:]
+
+def encode_mapping_keys(df1, df2, mapping_keys, key_cache=None, path1=None, path2=None, progress=None,
+                        column_index=column_key_index):
+    """
+    Encodes the composite keys of df1 and df2 into a shared int64 code space:
+    equal composite keys get equal codes in both files. The key columns are
+    normalized and factorized one at a time by column_index (column_key_index,
+    or a parallel variant), so only one column of key strings is alive at any
+    point. With a KeyIndexCache and the files the frames were read from, each
+    column index is taken from the cache when still valid. progress, when
+    given, is called as progress(phase, done, total) per column.
+    """
+    def index_of(df, path, col):
+        if key_cache is not None and path:
+            return key_cache.column_index(df, path, col, column_index)
+        return column_index(df, col)
+
+    def column_codes():
+        for i, (k1, k2) in enumerate(mapping_keys):
+            if progress:
+                progress("Encoding keys", i, len(mapping_keys))
+            yield _shared_column_codes(index_of(df1, path1, k1), index_of(df2, path2, k2))
+
+    return _combine_key_columns(column_codes(), len(df1))
+
+def user_cache_dir(name):
+    """
+    Returns the directory for the named on-disk cache, private to the current
+    user: under %LOCALAPPDATA% on Windows and $XDG_CACHE_HOME or ~/.cache
+    elsewhere, instead of a temp directory other users can write to.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, name)
+
+def _pack_strings(values):
+    """Packs str values into (UTF-8 bytes, end offsets) arrays that np.save can store without pickle."""
+    encoded = [value.encode("utf-8", "surrogatepass") for value in values]
+    ends = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), ends
+
+def _unpack_strings(data, ends):
+    """Inverse of _pack_strings: returns the values as an object array."""
+    blob = data.tobytes()
+    starts = np.concatenate([[0], ends[:-1]]).astype(np.int64)
+    return np.array([blob[a:b].decode("utf-8", "surrogatepass") for a, b in zip(starts.tolist(), ends.tolist())], dtype=object)
+
+class KeyIndexCache:
+    """
+    On-disk cache of the per-column key indexes of input files, so a repeat
+    comparison against an unchanged file skips normalizing and hashing its key
+    columns. An entry is identified by file path, key column and row count, and
+    is valid while the file's size and mtime are unchanged; the codes are
+    memory-mapped on load. Entries are plain .npy/.npz arrays read with
+    allow_pickle=False, kept in a per-user directory that is held under
+    max_bytes by removing the least recently used entries.
+    """
+    def __init__(self, cache_dir=None, max_bytes=KEY_INDEX_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or user_cache_dir("mapping_search_key_index")
+        self.max_bytes = max_bytes
+
+    def _entry_base(self, path, col, n_rows):
+        ident = repr((os.path.abspath(path), str(col), int(n_rows)))
+        return os.path.join(self.cache_dir, hashlib.sha1(ident.encode("utf-8")).hexdigest())
+
+    def column_index(self, df, path, col, compute=column_key_index):
+        """
+        Returns (codes, distinct key values) of df[col], from the cache when
+        possible and from compute(df, col) otherwise.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return compute(df, col)
+        signature = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        base = self._entry_base(path, col, len(df))
+        try:
+            with np.load(base + ".meta.npz", allow_pickle=False) as meta:
+                if np.array_equal(meta["signature"], signature):
+                    codes = np.load(base + ".codes.npy", mmap_mode="r", allow_pickle=False)
+                    if len(codes) == len(df):
+                        uniques = _unpack_strings(meta["data"], meta["ends"])
+                        os.utime(base + ".meta.npz") # Marks the entry as recently used
+                        print(f"DEBUG: Key index cache hit for {path} [{col}]")
+                        return codes, uniques
+        except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+
+        codes, uniques = compute(df, col)
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # The meta file is written last and marks the entry as complete
+            np.save(base + ".codes.tmp.npy", codes)
+            os.replace(base + ".codes.tmp.npy", base + ".codes.npy")
+            data, ends = _pack_strings(uniques)
+            with open(base + ".meta.tmp", "wb") as f:
+                np.savez(f, signature=signature, data=data, ends=ends)
+            os.replace(base + ".meta.tmp", base + ".meta.npz")
+        except OSError as e:
+            print(f"DEBUG: Could not write key index cache for {path}: {e}")
+            return codes, uniques
+        self._evict(keep=os.path.basename(base))
+        return codes, uniques
+
+    def _evict(self, keep):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = {} # entry name -> [last used, total size]
+        for name in os.listdir(self.cache_dir):
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entry = entries.setdefault(name.split(".", 1)[0], [0, 0])
+            entry[0] = max(entry[0], stat.st_mtime_ns)
+            entry[1] += stat.st_size
+        total = sum(size for _, size in entries.values())
+        for last_used, size, name in sorted((used, size, name) for name, (used, size) in entries.items()):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            # The meta file goes first, so a half-removed entry reads as a miss
+            for suffix in (".meta.npz", ".codes.npy"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name + suffix))
+                except OSError:
+                    pass
+            total -= size
+
+def join_key_codes(codes1, codes2, count_option=1, keep1=None, keep2=None):
+    """
+    Joins two int64 key-code arrays with the same rules as compare_frames and
+    returns (left, right, left_only, right_only) positions into the arrays.
+    keep1/keep2 are the optional search-filter masks.
+    """
+    codes1 = np.asarray(codes1, dtype=np.int64)
+    codes2 = np.asarray(codes2, dtype=np.int64)
+    f1 = np.arange(len(codes1)) if keep1 is None else np.flatnonzero(keep1)
+    f2 = np.arange(len(codes2)) if keep2 is None else np.flatnonzero(keep2)
+    c1 = codes1[f1]
+
+    # Filtered File 2 rows sorted by code, ties kept in file order
+    sorted2 = f2[np.argsort(codes2[f2], kind="stable")]
+    sorted_codes2 = codes2[sorted2]
+    lo = np.searchsorted(sorted_codes2, c1, side="left")
+    hi = np.searchsorted(sorted_codes2, c1, side="right")
+    counts = hi - lo
+    if count_option == 2:
+        hit = counts > 0
+        left, right = f1[hit], sorted2[lo[hit]]
+    else:
+        left = np.repeat(f1, counts)
+        starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        right = sorted2[starts + np.arange(len(left))]
+        if count_option == 3:
+            _, first = np.unique(right, return_index=True)
+            first.sort()
+            left, right = left[first], right[first]
+
+    left_only = f1[~np.isin(c1, codes2)]
+    right_only = f2[~np.isin(codes2[f2], c1)]
+    return left, right, left_only, right_only
+
+def count_key_pairs(codes1, codes2):
+    """Number of (File 1, File 2) row pairs sharing a key code, without building them."""
+    uniques2, counts2 = np.unique(codes2, return_counts=True)
+    if len(uniques2) == 0:
+        return 0
+    idx = np.minimum(np.searchsorted(uniques2, codes1), len(uniques2) - 1)
+    hit = uniques2[idx] == codes1
+    return int(counts2[idx[hit]].sum())
+
+class JoinCache:
+    """
+    Unfiltered join of two loaded files: every matching pair, sorted by File 1
+    then File 2 position. Kept so that a new search filter or count option only
+    post-filters these index arrays instead of joining the files again.
+    """
+    def __init__(self, df1, df2, mapping_keys, codes1, codes2, left, right):
+        self.df1 = df1
+        self.df2 = df2
+        self.mapping_keys = tuple(mapping_keys)
+        order = np.lexsort((right, left))
+        self.left = np.asarray(left, dtype=np.int64)[order]
+        self.right = np.asarray(right, dtype=np.int64)[order]
+        self.n1, self.n2 = len(codes1), len(codes2)
+        # File 1 rows whose key does not occur anywhere in File 2
+        self.unmatched1 = np.flatnonzero(~np.isin(codes1, codes2))
+
+    def is_for(self, df1, df2, mapping_keys):
+        """True when the cache was built from these very frames and key mapping."""
+        return self.df1 is df1 and self.df2 is df2 and self.mapping_keys == tuple(mapping_keys)
+
+    def result(self, count_option=1, mask1=None, mask2=None):
+        """
+        Applies the search-filter masks and count option to the cached pairs and
+        returns the same ComparisonResult compare_frames would.
+        """
+        keep1 = np.ones(self.n1, dtype=bool) if mask1 is None else np.asarray(mask1, dtype=bool)
+        keep2 = np.ones(self.n2, dtype=bool) if mask2 is None else np.asarray(mask2, dtype=bool)
+        partner_kept = keep1[self.left]
+        selected = np.flatnonzero(partner_kept & keep2[self.right])
+        if count_option == 2:
+            _, first = np.unique(self.left[selected], return_index=True)
+            selected = selected[first]
+        elif count_option == 3:
+            _, first = np.unique(self.right[selected], return_index=True)
+            first.sort()
+            selected = selected[first]
+
+        left_only = self.unmatched1[keep1[self.unmatched1]]
+        has_partner = np.zeros(self.n2, dtype=bool)
+        has_partner[self.right[partner_kept]] = True
+        right_only = np.flatnonzero(keep2 & ~has_partner)
+        return ComparisonResult(self.left[selected], self.right[selected], left_only, right_only)
+
+def _excel_cell_to_str(value, na_filter=True):
+    """
+    Converts an openpyxl cell value the way pd.read_excel(dtype=str) does:
+    blank cells and, with na_filter, the CSV_NA_VALUES strings become NaN.
+    """
+    if value is None or na_filter and isinstance(value, str) and value in CSV_NA_VALUES:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def _excel_header(header):
+    """
+    Column names for an xlsx header row as pd.read_excel names them: blank
+    cells become "Unnamed: i" and repeated names get ".1", ".2", ... suffixes.
+    """
+    names = [_excel_cell_to_str(h, na_filter=False) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def _iter_excel_chunks(path, chunksize, usecols=None):
+    """Streams the first sheet of an xlsx file with openpyxl in read-only mode."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _excel_header(header)
+        keep = [i for i, c in enumerate(columns) if usecols is None or c in usecols]
+        names = [columns[i] for i in keep]
+        block = []
+        blank_rows = 0 # Empty rows are only kept if data follows them, like pd.read_excel
+        for row in rows:
+            if all(v is None for v in row):
+                blank_rows += 1
+                continue
+            values = [_excel_cell_to_str(row[i]) if i < len(row) else np.nan for i in keep]
+            block.extend([[np.nan] * len(keep)] * blank_rows)
+            blank_rows = 0
+            block.append(values)
+            while len(block) >= chunksize: # Blank-row padding can overshoot; chunks stay exactly chunksize rows
+                yield pd.DataFrame(block[:chunksize], columns=names, dtype=object)
+                block = block[chunksize:]
+        if block:
+            yield pd.DataFrame(block, columns=names, dtype=object)
+    finally:
+        wb.close()
+
+def _txt_separator(path):
+    """TXT files are read as CSV first and as tab-separated if that fails, like read_file does."""
+    try:
+        pd.read_csv(path, dtype=str, nrows=1000)
+        return ","
+    except Exception:
+        return "\t"
+
+def iter_file_chunks(path, chunksize=CHUNKSIZE, usecols=None):
+    """
+    Yields the rows of a CSV, TXT or XLSX file as str DataFrames of at most
+    chunksize rows, so callers never hold the whole file in memory.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, dtype=str, chunksize=chunksize, usecols=usecols)
+    elif ext == ".txt":
+        yield from pd.read_csv(path, sep=_txt_separator(path), dtype=str, chunksize=chunksize, usecols=usecols)
+    elif ext == ".xlsx":
+        yield from _iter_excel_chunks(path, chunksize, usecols)
+    else:
+        raise ValueError(f"Unsupported file extension: {ext}")
+
+def read_columns(path):
+    """
+    Returns the column names of a CSV, TXT or XLSX file without reading its
+    data: only the CSV header line, or the xlsx sheet up to its first row.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return list(pd.read_csv(path, dtype=str, nrows=0).columns)
+    if ext == ".txt":
+        return list(pd.read_csv(path, sep=_txt_separator(path), dtype=str, nrows=0).columns)
+    if ext == ".xlsx":
+        wb = load_workbook(path, read_only=True)
+        try:
+            header = next(wb.worksheets[0].iter_rows(values_only=True), ())
+        finally:
+            wb.close()
+        return _excel_header(header)
+    raise ValueError(f"Unsupported file extension: {ext}")
+
+def read_csv_file(path, sep=",", usecols=None):
+    """
+    Reads a whole CSV or TXT file as str columns. With pyarrow installed the
+    file is parsed by Arrow's multithreaded reader straight into Arrow string
+    columns, which pandas' str dtype wraps without converting each cell to a
+    Python object. Column names and missing values match pd.read_csv(dtype=str),
+    and any file Arrow cannot read is left to pandas' C parser.
+    """
+    if pa is None:
+        return pd.read_csv(path, sep=sep, dtype=str, usecols=usecols)
+    columns = list(pd.read_csv(path, sep=sep, dtype=str, nrows=0).columns)
+    keep = [f"f{i}" for i, c in enumerate(columns) if usecols is None or c in usecols]
+    try:
+        table = pa_csv.read_csv(
+            path,
+            read_options=pa_csv.ReadOptions(skip_rows=1, column_names=[f"f{i}" for i in range(len(columns))]),
+            parse_options=pa_csv.ParseOptions(delimiter=sep, newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in keep},
+                                                  include_columns=keep, null_values=CSV_NA_VALUES,
+                                                  strings_can_be_null=True))
+    except (pa.ArrowInvalid, UnicodeDecodeError):
+        # e.g. rows with a different number of fields, which pandas pads or rejects with its own error
+        return pd.read_csv(path, sep=sep, dtype=str, usecols=usecols)
+    df = table.to_pandas(types_mapper=lambda dtype: pd.StringDtype("pyarrow", na_value=np.nan))
+    df.columns = [columns[int(name[1:])] for name in keep]
+    return df
+
+def read_excel_sheet(path, usecols=None):
+    """
+    Reads the whole first sheet of an xlsx file as str columns with
+    XLSX_ENGINE. Calamine parses the sheet natively and is several times
+    faster than openpyxl on large sheets, but it always parses the whole
+    sheet, so previews and header reads stay on openpyxl.
+
+    Columns are named as _excel_header names them, so a numeric header such as
+    2024 is the column "2024", and usecols is matched against those names.
+    Raises ValueError when some of usecols are not in the header row.
+    """
+    # Selecting by name after the read costs nothing extra, as the whole sheet is parsed anyway
+    df = pd.read_excel(path, sheet_name=0, dtype=str, engine=XLSX_ENGINE)
+    df.columns = [str(column) for column in df.columns]
+    if usecols is None:
+        return df
+    missing = [column for column in usecols if column not in df.columns]
+    if missing:
+        raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+    return df[[column for column in df.columns if column in usecols]]
+
+class SidecarCache:
+    """
+    On-disk Parquet copies of fully parsed input files, so reopening an
+    unchanged file reads the compressed columnar copy instead of parsing the
+    CSV or xlsx again. An entry is identified by the file's path, size and
+    mtime, so a changed file simply gets a new entry. The directory is kept
+    under max_bytes by removing the least recently used entries.
+    """
+    def __init__(self, cache_dir=None, max_bytes=SIDECAR_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or user_cache_dir("input_sidecar_cache")
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        ident = repr((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+        return os.path.join(self.cache_dir, hashlib.sha1(ident.encode("utf-8")).hexdigest() + ".parquet")
+
+    def read(self, path, parse, usecols=None):
+        """
+        Returns the str columns of path (only usecols when given) from its
+        Parquet copy when there is one, and parse(usecols) otherwise. A parse
+        of every column is stored for next time.
+        """
+        entry = self._entry_path(path)
+        if entry and os.path.exists(entry):
+            try:
+                df = pd.read_parquet(entry, columns=usecols)
+                os.utime(entry) # Marks the entry as recently used
+                print(f"DEBUG: Sidecar cache hit for {path}")
+                return df
+            except (OSError, ValueError, ImportError) as e:
+                print(f"DEBUG: Could not read sidecar cache for {path}: {e}")
+
+        df = parse(usecols)
+        if entry and usecols is None:
+            self._store(entry, df)
+        return df
+
+    def _store(self, entry, df):
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            df.to_parquet(entry + ".tmp", index=False, compression="zstd")
+            os.replace(entry + ".tmp", entry)
+        except (OSError, ValueError, ImportError) as e:
+            # e.g. no Parquet engine installed, or column names Parquet cannot store
+            print(f"DEBUG: Could not write sidecar cache {entry}: {e}")
+            if os.path.exists(entry + ".tmp"):
+                os.remove(entry + ".tmp")
+            return
+        self._evict(keep=entry)
+
+    def _evict(self, keep):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(self.cache_dir, name)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+
+def read_full_file(path, progress=None, phase="Loading", usecols=None, cache=None):
+    """
+    Reads a whole CSV, TXT or XLSX file as str columns chunk by chunk, calling
+    progress(phase, rows_read) after every chunk when given. usecols limits the
+    read to those columns. With pyarrow or calamine available a CSV/TXT or
+    xlsx file is read in one go instead. cache is an optional SidecarCache.
+    """
+    if cache is not None:
+        df = cache.read(path, lambda usecols: read_full_file(path, progress, phase, usecols), usecols)
+        if progress:
+            progress(phase, len(df))
+        return df
+    ext = os.path.splitext(path)[1].lower()
+    if (pa is not None and ext in (".csv", ".txt")) or (XLSX_ENGINE and ext == ".xlsx"):
+        if ext == ".xlsx":
+            df = read_excel_sheet(path, usecols)
+        else:
+            df = read_csv_file(path, "," if ext == ".csv" else _txt_separator(path), usecols)
+        if progress:
+            progress(phase, len(df))
+        return df
+    chunks = []
+    rows = 0
+    for chunk in iter_file_chunks(path, usecols=usecols):
+        chunks.append(chunk)
+        rows += len(chunk)
+        if progress:
+            progress(phase, rows)
+    if not chunks:
+        return pd.DataFrame(columns=[c for c in read_columns(path) if usecols is None or c in usecols], dtype=str)
+    return pd.concat(chunks, ignore_index=True)
+
+def projected_columns(headers, required, payload):
+    """
+    Returns the columns of headers, in file order, that a projected load reads:
+    the required key and search columns plus the payload columns. Returns None
+    (read every column) when payload is None.
+    """
+    if payload is None:
+        return None
+    keep = set(required) | set(payload)
+    return [h for h in headers if h in keep]
+
+def read_rows_at(path, positions):
+    """
+    Streams path and returns only the rows at the given positions (-1 entries
+    are ignored), indexed by position. Used to show results of a comparison
+    that never loaded the whole file.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    wanted = np.unique(positions[positions >= 0])
+    frames = []
+    columns = []
+    offset = 0
+    for chunk in iter_file_chunks(path):
+        columns = list(chunk.columns)
+        end = offset + len(chunk)
+        lo, hi = np.searchsorted(wanted, [offset, end])
+        if hi > lo:
+            frames.append(chunk.iloc[wanted[lo:hi] - offset])
+        offset = end
+        if hi == len(wanted):
+            break
+    if not frames:
+        return pd.DataFrame(columns=columns, index=pd.Index([], dtype=np.int64))
+    rows = pd.concat(frames)
+    rows.index = wanted[:len(rows)]
+    return rows
+
+def _spill_partitions(path, key_columns, num_partitions, spill_dir, prefix, filter_column=None, column_filter=None,
+                      progress=None, phase="Partitioning"):
+    """
+    Streams path and appends every row, tagged with its position in the file and
+    its search-filter outcome, to the spill file of its key-hash partition.
+    Returns the spill file paths and the file's column names.
+    """
+    spill_files = [os.path.join(spill_dir, f"{prefix}_{i}.pkl") for i in range(num_partitions)]
+    handles = [open(f, "wb") for f in spill_files]
+    columns = []
+    offset = 0
+    try:
+        for chunk in iter_file_chunks(path):
+            chunk = chunk.reset_index(drop=True)
+            columns = list(chunk.columns)
+            keys = build_key_frame(chunk, key_columns)
+            partition = pd.util.hash_pandas_object(keys, index=False).to_numpy() % np.uint64(num_partitions)
+            if filter_column is not None and filter_column in columns:
+                keep = column_filter(chunk[filter_column])
+            else:
+                keep = np.ones(len(chunk), dtype=bool)
+            chunk[SPILL_POS_COL] = np.arange(offset, offset + len(chunk), dtype=np.int64)
+            chunk[SPILL_KEEP_COL] = keep
+            offset += len(chunk)
+            for p in np.unique(partition):
+                pickle.dump(chunk[partition == p], handles[int(p)], protocol=pickle.HIGHEST_PROTOCOL)
+            if progress:
+                progress(phase, offset)
+    finally:
+        for handle in handles:
+            handle.close()
+    return spill_files, columns
+
+def _load_spill(path, columns):
+    """Reads back all chunks appended to one spill file."""
+    frames = []
+    with open(path, "rb") as f:
+        while True:
+            try:
+                frames.append(pickle.load(f))
+            except EOFError:
+                break
+    if not frames:
+        return pd.DataFrame(columns=columns + [SPILL_POS_COL, SPILL_KEEP_COL])
+    return pd.concat(frames, ignore_index=True)
+
+def compare_files_partitioned(path1, path2, mapping_keys, count_option=1, filter_column=None,
+                              column_filter=None, memory_limit_mb=1024, spill_dir=None, progress=None):
+    """
+    Disk-backed variant of compare_frames for files larger than RAM. Both files
+    are streamed once and hash-partitioned by composite key into spill files,
+    sized so that one partition of each file fits in memory_limit_mb. Rows with
+    equal keys always land in the same partition, so comparing partition by
+    partition gives the same ComparisonResult (in file positions) as
+    compare_frames on the fully loaded files.
+
+    column_filter, when given, maps the filter_column Series of a chunk to the
+    boolean search-filter mask for those rows. progress, when given, is called
+    as progress(phase, done, total=None) after every chunk and partition.
+    """
+    total_bytes = os.path.getsize(path1) + os.path.getsize(path2)
+    num_partitions = max(1, math.ceil(total_bytes * IN_MEMORY_EXPANSION / (memory_limit_mb * 1024 * 1024)))
+    print(f"DEBUG: Disk-backed comparison using {num_partitions} partitions.")
+
+    lefts, rights, left_onlys, right_onlys = [], [], [], []
+    with tempfile.TemporaryDirectory(prefix="sbs_spill_", dir=spill_dir) as tmp:
+        files1, cols1 = _spill_partitions(path1, [k1 for k1, _ in mapping_keys], num_partitions, tmp, "file1",
+                                          filter_column, column_filter, progress, "Partitioning File 1")
+        files2, cols2 = _spill_partitions(path2, [k2 for _, k2 in mapping_keys], num_partitions, tmp, "file2",
+                                          filter_column, column_filter, progress, "Partitioning File 2")
+        for i, (f1, f2) in enumerate(zip(files1, files2)):
+            if progress:
+                progress("Comparing partitions", i, num_partitions)
+            part1 = _load_spill(f1, cols1)
+            part2 = _load_spill(f2, cols2)
+            result = compare_frames(part1, part2, mapping_keys, count_option,
+                                    part1[SPILL_KEEP_COL].to_numpy(dtype=bool), part2[SPILL_KEEP_COL].to_numpy(dtype=bool))
+            pos1 = part1[SPILL_POS_COL].to_numpy(dtype=np.int64)
+            pos2 = part2[SPILL_POS_COL].to_numpy(dtype=np.int64)
+            lefts.append(pos1[result.left])
+            rights.append(pos2[result.right])
+            left_onlys.append(pos1[result.left_only])
+            right_onlys.append(pos2[result.right_only])
+            os.remove(f1)
+            os.remove(f2)
+
+    left = np.concatenate(lefts)
+    right = np.concatenate(rights)
+    order = np.lexsort((right, left))
+    return ComparisonResult(left[order], right[order], np.sort(np.concatenate(left_onlys)), np.sort(np.concatenate(right_onlys)))
+
+def _shard_of(codes, num_shards):
+    """Spreads key codes over shards with a multiplicative hash."""
+    mixed = codes.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return ((mixed >> np.uint64(32)) % np.uint64(num_shards)).astype(np.int64)
+
+class WorkerPool:
+    """
+    A process pool kept between searches, so parallel comparisons do not
+    start new processes every time. It is restarted when the worker count
+    changes or after a worker process died.
+    """
+    def __init__(self):
+        self.executor = None
+        self.workers = 0
+
+    def map(self, workers, fn, *iterables):
+        """Runs fn over the iterables on workers processes and returns the results as a list."""
+        if self.executor is None or self.workers != workers:
+            self.shutdown()
+            # Forked workers share this process's resource tracker only if it already runs; one of
+            # their own would report the shared key arrays as leaked when they exit
+            resource_tracker.ensure_running()
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+            self.workers = workers
+        try:
+            return list(self.executor.map(fn, *iterables))
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+def _column_key_index_slice(ipc_path, start, stop):
+    """
+    Process-pool worker: memory-maps the Arrow IPC copy of a key column and
+    returns column_key_index of rows start:stop.
+    """
+    with pa.memory_map(ipc_path) as source:
+        values = pa.ipc.open_file(source).read_all().column(0).slice(start, stop - start).to_pandas()
+    return column_key_index(pd.DataFrame({"key": values}), "key")
+
+def column_key_index_parallel(df, col, pool, workers):
+    """
+    Multi-core column_key_index. The column is written once to a temporary
+    Arrow IPC file, every worker normalizes and factorizes one slice of its
+    rows from a memory map of it, and the slice indexes are merged into the
+    same (codes, distinct key values) that column_key_index returns: values
+    are numbered in order of first appearance. Short or missing columns, and
+    columns Arrow cannot hold, are indexed in this process.
+    """
+    if pa is None or workers <= 1 or col not in df.columns or len(df) < PARALLEL_MIN_ROWS:
+        return column_key_index(df, col)
+    try:
+        table = pa.table({"key": pa.array(df[col], from_pandas=True)})
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return column_key_index(df, col)
+    fd, ipc_path = tempfile.mkstemp(suffix=".arrow")
+    os.close(fd)
+    try:
+        with pa.OSFile(ipc_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table
+        bounds = np.linspace(0, len(df), workers + 1).astype(np.int64)
+        parts = pool.map(workers, _column_key_index_slice, [ipc_path] * workers, bounds[:-1].tolist(), bounds[1:].tolist())
+    finally:
+        os.remove(ipc_path)
+
+    # Slice-local codes are translated through one factorize of the slices' distinct values
+    slice_codes, uniques = pd.factorize(np.concatenate([part[1] for part in parts]))
+    codes = []
+    start = 0
+    for local_codes, local_uniques in parts:
+        codes.append(slice_codes[start:start + len(local_uniques)][local_codes])
+        start += len(local_uniques)
+    return np.concatenate(codes).astype(np.int64), np.asarray(uniques, dtype=object)
+
+def _to_shared_memory(array, blocks, handles, name):
+    """Copies array into a new shared memory block and records how workers can attach to it."""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    handles.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    blocks[name] = (shm.name, array.dtype.str, len(array))
+
+def _attach_shared_memory(name):
+    """
+    Attaches to a shared memory block the parent process created and owns,
+    without registering it with the resource tracker where Python allows
+    (3.13+). Before that the registration goes to the parent's tracker, which
+    WorkerPool starts before the workers, and ends when the parent unlinks the
+    block; unregistering it here would drop the parent's own registration.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # no track argument before Python 3.13
+        return shared_memory.SharedMemory(name=name)
+
+def _compare_shard(blocks, bounds1, bounds2, count_option):
+    """
+    Process-pool worker: attaches to the shared key arrays, joins the rows of one
+    shard and returns their positions in the files. Nothing but the shard
+    bounds and the resulting index arrays crosses the process boundary.
+    """
+    handles = []
+    try:
+        arrays = {}
+        for name, (shm_name, dtype, length) in blocks.items():
+            shm = _attach_shared_memory(shm_name)
+            handles.append(shm)
+            arrays[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+        rows1 = arrays["order1"][bounds1[0]:bounds1[1]].copy()
+        rows2 = arrays["order2"][bounds2[0]:bounds2[1]].copy()
+        left, right, left_only, right_only = join_key_codes(arrays["codes1"][rows1], arrays["codes2"][rows2], count_option,
+                                                            arrays["keep1"][rows1], arrays["keep2"][rows2])
+        del arrays
+        return rows1[left], rows2[right], rows1[left_only], rows2[right_only]
+    finally:
+        for shm in handles:
+            shm.close()
+
+def compare_frames_parallel(df1, df2, mapping_keys, count_option=1, mask1=None, mask2=None, workers=None, codes=None,
+                            pool=None):
+    """
+    Multi-core variant of compare_frames. The key columns are normalized and
+    factorized by the workers (see column_key_index_parallel) and combined
+    into int64 codes as in compare_frames, both files are sharded by a hash
+    of the code, and the shards are joined by the workers, which read the
+    codes, filter masks and shard orderings from shared memory. pool is a
+    WorkerPool to reuse; without one a pool is started for this call only.
+    Returns the same ComparisonResult as compare_frames.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    own_pool = pool is None
+    pool = pool or WorkerPool()
+    try:
+        return _compare_frames_on_pool(df1, df2, mapping_keys, count_option, mask1, mask2, workers, codes, pool)
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+def _compare_frames_on_pool(df1, df2, mapping_keys, count_option, mask1, mask2, workers, codes, pool):
+    """The body of compare_frames_parallel, run on a WorkerPool."""
+    if codes is None:
+        codes = encode_mapping_keys(df1, df2, mapping_keys,
+                                    column_index=lambda df, col: column_key_index_parallel(df, col, pool, workers))
+    codes1, codes2 = codes
+    keep1 = np.ones(len(codes1), dtype=bool) if mask1 is None else np.asarray(mask1, dtype=bool)
+    keep2 = np.ones(len(codes2), dtype=bool) if mask2 is None else np.asarray(mask2, dtype=bool)
+    if workers == 1:
+        return ComparisonResult(*join_key_codes(codes1, codes2, count_option, keep1, keep2))
+
+    shard1 = _shard_of(codes1, workers)
+    shard2 = _shard_of(codes2, workers)
+    bounds1 = np.concatenate([[0], np.cumsum(np.bincount(shard1, minlength=workers))])
+    bounds2 = np.concatenate([[0], np.cumsum(np.bincount(shard2, minlength=workers))])
+    blocks = {}
+    handles = []
+    try:
+        for name, array in (("codes1", codes1), ("codes2", codes2), ("keep1", keep1), ("keep2", keep2),
+                            ("order1", np.argsort(shard1, kind="stable")), ("order2", np.argsort(shard2, kind="stable"))):
+            _to_shared_memory(array, blocks, handles, name)
+        parts = pool.map(workers, _compare_shard, [blocks] * workers,
+                         [(int(bounds1[i]), int(bounds1[i + 1])) for i in range(workers)],
+                         [(int(bounds2[i]), int(bounds2[i + 1])) for i in range(workers)], [count_option] * workers)
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+
+    left = np.concatenate([part[0] for part in parts])
+    right = np.concatenate([part[1] for part in parts])
+    order = np.lexsort((right, left))
+    return ComparisonResult(left[order], right[order],
+                            np.sort(np.concatenate([part[2] for part in parts])),
+                            np.sort(np.concatenate([part[3] for part in parts])))
+
+class StreamingResultWriter:
+    """
+    Writes result rows to a .csv or .xlsx file as they are produced, without
+    keeping them in memory. xlsx output uses openpyxl's write-only mode and
+    continues on a new sheet (with the header repeated) when a sheet is full.
+    """
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows_written = 0
+        if os.path.splitext(path)[1].lower() == ".csv":
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.columns)
+            self._workbook = None
+        else:
+            self._file = None
+            self._workbook = Workbook(write_only=True)
+            self._sheet = None
+            self._sheet_rows = EXCEL_MAX_DATA_ROWS
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self._workbook is None:
+                self._csv.writerow(row)
+            else:
+                if self._sheet_rows >= EXCEL_MAX_DATA_ROWS:
+                    self._sheet = self._workbook.create_sheet(f"Results {len(self._workbook.worksheets) + 1}")
+                    self._sheet.append(self.columns)
+                    self._sheet_rows = 0
+                self._sheet.append(row)
+                self._sheet_rows += 1
+            self.rows_written += 1
+
+    def close(self):
+        if self._workbook is None:
+            self._file.close()
+        else:
+            if self._sheet is None:
+                self._workbook.create_sheet("Results 1").append(self.columns)
+            self._workbook.save(self.path)
+
+def _composite_key_strings(keys):
+    """Joins the columns of a key frame into one string per row."""
+    joined = keys.iloc[:, 0].astype(object)
+    for col in keys.columns[1:]:
+        joined = joined + "\x1f" + keys[col]
+    return joined.to_numpy(dtype=object)
+
+def _lookup_key_ids(keys, key_ids, add_missing):
+    """
+    Maps each row of a key frame to an integer id through the key_ids dict.
+    Unknown keys get a new id when add_missing is set and -1 otherwise; the dict
+    is only consulted once per distinct key of the chunk.
+    """
+    inverse, uniques = pd.factorize(_composite_key_strings(keys))
+    if add_missing:
+        ids = np.fromiter((key_ids.setdefault(k, len(key_ids)) for k in uniques), dtype=np.int64, count=len(uniques))
+    else:
+        ids = np.fromiter((key_ids.get(k, -1) for k in uniques), dtype=np.int64, count=len(uniques))
+    return ids[inverse]
+
+def compare_files_streaming(path1, path2, mapping_keys, output_path, count_option=1, filter_column=None,
+                            column_filter=None, chunksize=CHUNKSIZE, progress=None):
+    """
+    Streaming comparison that writes its results straight to output_path.
+
+    File 2 is first read key columns only to build an id for every distinct
+    composite key. File 1 is then streamed chunk by chunk: File 1 Only rows are
+    written immediately, and matched File 1 rows are spilled to disk, bucketed
+    by the File 2 chunk their partner lives in. A final pass over File 2 writes
+    the Match rows and the File 2 Only rows. Apart from one chunk at a time,
+    memory holds the key ids and a few small arrays per File 2 row. progress,
+    when given, is called as progress(phase, done, total=None) after every chunk.
+
+    Returns (match_count, file1_only_count, file2_only_count).
+    """
+    key_cols1 = [k1 for k1, _ in mapping_keys]
+    key_cols2 = [k2 for _, k2 in mapping_keys]
+    columns1 = read_columns(path1)
+    columns2 = read_columns(path2)
+
+    # --- Pass 1: key-only read of File 2 ---
+    key_ids = {}
+    id_parts, keep_parts = [], []
+    chunk_starts2 = [] # Position of the first row of every File 2 chunk, for bucketing matches in pass 2
+    usecols2 = [c for c in columns2 if c in key_cols2 or c == filter_column]
+    for chunk in iter_file_chunks(path2, chunksize, usecols=usecols2):
+        chunk_starts2.append(sum(len(part) for part in id_parts))
+        id_parts.append(_lookup_key_ids(build_key_frame(chunk, key_cols2), key_ids, add_missing=True))
+        if filter_column is not None and filter_column in chunk.columns:
+            keep_parts.append(column_filter(chunk[filter_column]))
+        else:
+            keep_parts.append(np.ones(len(chunk), dtype=bool))
+        if progress:
+            progress("Indexing File 2 keys", sum(len(part) for part in keep_parts))
+    ids2 = np.concatenate(id_parts) if id_parts else np.empty(0, dtype=np.int64)
+    keep2 = np.concatenate(keep_parts) if keep_parts else np.empty(0, dtype=bool)
+    del id_parts, keep_parts
+    filtered2 = np.flatnonzero(keep2)
+    sorted2 = filtered2[np.argsort(ids2[filtered2], kind="stable")]
+    sorted_ids2 = ids2[sorted2]
+    seen_in_file1 = np.zeros(len(key_ids), dtype=bool)
+    claimed2 = np.zeros(len(ids2), dtype=bool)
+    blank1 = [''] * len(columns1)
+    blank2 = [''] * len(columns2)
+
+    writer = StreamingResultWriter(output_path, ['Source'] + [f"File1_{h}" for h in columns1] + [f"File2_{h}" for h in columns2])
+    match_count = file1_only_count = file2_only_count = 0
+    try:
+        with tempfile.TemporaryDirectory(prefix="sbs_stream_") as tmp:
+            # --- Pass 2: stream File 1 ---
+            rows_done = 0
+            for chunk in iter_file_chunks(path1, chunksize):
+                chunk = chunk.reset_index(drop=True)
+                ids1 = _lookup_key_ids(build_key_frame(chunk, key_cols1), key_ids, add_missing=False)
+                if filter_column is not None and filter_column in chunk.columns:
+                    filtered1 = np.flatnonzero(column_filter(chunk[filter_column]))
+                else:
+                    filtered1 = np.arange(len(chunk))
+                c1 = ids1[filtered1]
+                seen_in_file1[c1[c1 >= 0]] = True
+
+                only1 = filtered1[c1 < 0]
+                writer.write_rows(["File 1 Only"] + row + blank2 for row in format_display_rows(chunk, only1))
+                file1_only_count += len(only1)
+
+                lo = np.searchsorted(sorted_ids2, c1, side="left")
+                hi = np.searchsorted(sorted_ids2, c1, side="right")
+                counts = np.where(c1 >= 0, hi - lo, 0)
+                if count_option == 2:
+                    hit = counts > 0
+                    left, right = filtered1[hit], sorted2[lo[hit]]
+                else:
+                    left = np.repeat(filtered1, counts)
+                    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                    right = sorted2[starts + np.arange(len(left))]
+                    if count_option == 3:
+                        _, first = np.unique(right, return_index=True)
+                        first.sort()
+                        first = first[~claimed2[right[first]]]
+                        left, right = left[first], right[first]
+                        claimed2[right] = True
+                match_count += len(left)
+
+                # Spill matched File 1 rows next to the File 2 chunk holding their partner
+                spill = chunk.iloc[left].reset_index(drop=True)
+                spill[SPILL_POS_COL] = right
+                bucket = np.searchsorted(chunk_starts2, right, side="right") - 1
+                for b in np.unique(bucket):
+                    with open(os.path.join(tmp, f"bucket_{b}.pkl"), "ab") as f:
+                        pickle.dump(spill[bucket == b], f, protocol=pickle.HIGHEST_PROTOCOL)
+                rows_done += len(chunk)
+                if progress:
+                    progress("Streaming File 1", rows_done)
+
+            # --- Pass 3: stream File 2, pairing spilled File 1 rows and emitting File 2 Only rows ---
+            only2_mask = keep2 & ~seen_in_file1[ids2]
+            offset = 0
+            for b, chunk in enumerate(iter_file_chunks(path2, chunksize)):
+                chunk = chunk.reset_index(drop=True)
+                bucket_path = os.path.join(tmp, f"bucket_{b}.pkl")
+                if os.path.exists(bucket_path):
+                    matched1 = _load_spill(bucket_path, columns1)
+                    os.remove(bucket_path)
+                    rows1 = format_display_rows(matched1[columns1], np.arange(len(matched1)))
+                    rows2 = format_display_rows(chunk, matched1[SPILL_POS_COL].to_numpy(dtype=np.int64) - offset)
+                    writer.write_rows(["Match"] + r1 + r2 for r1, r2 in zip(rows1, rows2))
+                only2 = np.flatnonzero(only2_mask[offset:offset + len(chunk)])
+                writer.write_rows(["File 2 Only"] + blank1 + row for row in format_display_rows(chunk, only2))
+                file2_only_count += len(only2)
+                offset += len(chunk)
+                if progress:
+                    progress("Writing matches and File 2 Only rows", offset, len(ids2))
+    finally:
+        writer.close()
+    return match_count, file1_only_count, file2_only_count
+
+def diff_column_pairs(headers1, headers2, mapping_keys):
+    """
+    Returns the (File 1 column, File 2 column) pairs compared cell by cell for
+    matched rows: columns whose normalized names agree in both files, except
+    the columns that make up the composite key.
+    """
+    key_cols1 = {k1 for k1, _ in mapping_keys}
+    key_cols2 = {k2 for _, k2 in mapping_keys}
+    norm2 = {normalize_colname(h): h for h in headers2}
+    pairs = []
+    for h1 in headers1:
+        h2 = norm2.get(normalize_colname(h1))
+        if h2 is not None and h1 not in key_cols1 and h2 not in key_cols2:
+            pairs.append((h1, h2))
+    return pairs
+
+def compute_diff_bits(df1, df2, left, right, column_pairs, progress=None):
+    """
+    Compares the matched rows df1[left] / df2[right] one column pair at a time
+    and returns a packed bitmask per pair (uint8 array, bit i set when
+    column_pairs[i] differs). Values compare as displayed: stripped, NaN as ''.
+    progress, when given, is called as progress(phase, done, total) per column.
+    """
+    differs = np.zeros((len(left), len(column_pairs)), dtype=bool)
+    for i, (c1, c2) in enumerate(column_pairs):
+        if progress:
+            progress("Comparing cells", i, len(column_pairs))
+        a = df1[c1].to_numpy(dtype=object)[left]
+        b = df2[c2].to_numpy(dtype=object)[right]
+        column = (a != b) & ~(pd.isna(a) & pd.isna(b))
+        # Raw values that differ may still be equal once stripped
+        candidates = np.flatnonzero(column)
+        if len(candidates):
+            stripped_a = pd.Series(a[candidates], dtype=object).fillna('').astype(str).str.strip().to_numpy(dtype=object)
+            stripped_b = pd.Series(b[candidates], dtype=object).fillna('').astype(str).str.strip().to_numpy(dtype=object)
+            column[candidates] = stripped_a != stripped_b
+        differs[:, i] = column
+    return np.packbits(differs, axis=1, bitorder="little")
+
+def diff_maps(bits, column_pairs):
+    """Decodes packed diff bits into one {File 1 column: File 2 column} dict per row."""
+    if not column_pairs:
+        return [{} for _ in range(len(bits))]
+    flags = np.unpackbits(bits, axis=1, count=len(column_pairs), bitorder="little").astype(bool)
+    return [{column_pairs[i][0]: column_pairs[i][1] for i in np.flatnonzero(row)} for row in flags]
+
+def search_column_text(column, case_sensitive=False):
+    """
+    Factorizes a search column and normalizes its distinct values the way the
+    search compares cells: str(value).strip(), lowercased unless
+    case_sensitive. Returns (codes, text), text holding the distinct values.
+    """
+    codes, values = pd.factorize(column.to_numpy(dtype=object), use_na_sentinel=False)
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    values[missing] = [str(v) for v in values[missing]]
+    # Object dtype keeps the str methods (and regexes) on Python's semantics
+    text = pd.Series(values, dtype=object).str.strip()
+    if not case_sensitive:
+        text = text.str.lower()
+    return codes, text
+
+def match_search_text(text, search_value, search_type="exact", case_sensitive=False):
+    """
+    Tests normalized distinct values (from search_column_text) against the
+    Step 3 search and returns a boolean array. search_type is "exact",
+    "contains" or "regex" (a full match). Raises re.error for an invalid regex.
+    """
+    if not case_sensitive:
+        search_value = search_value.lower()
+    if search_type == "exact":
+        matched = text == search_value
+    elif search_type == "contains":
+        matched = text.str.contains(search_value, regex=False)
+    elif search_type == "regex":
+        matched = text.str.fullmatch(re.compile(search_value))
+    else:
+        return np.zeros(len(text), dtype=bool)
+    return matched.to_numpy(dtype=bool)
+
+def compile_search_filter(search_value, search_type="exact", case_sensitive=False):
+    """
+    Compiles the Step 3 search into a function mapping a column to a boolean
+    mask; see search_column_text and match_search_text. Each distinct cell
+    value is tested once. Raises re.error for an invalid regex.
+    """
+    if search_type == "regex":
+        re.compile(search_value if case_sensitive else search_value.lower())
+
+    def column_filter(column):
+        codes, text = search_column_text(column, case_sensitive)
+        return match_search_text(text, search_value, search_type, case_sensitive)[codes]
+
+    return column_filter
+
+class SearchFilterCache:
+    """
+    Search-filter state kept between searches on the same loaded frames: the
+    normalized distinct values of each search column, so a new filter only
+    tests those (an exact search is a hash lookup, and with pyarrow a contains
+    search is one vectorized pass over an Arrow copy), and the masks of the
+    last max_masks filters, so repeating one costs nothing. Regex searches run
+    Python's re over the distinct values. Everything is dropped when other
+    frames are loaded.
+    """
+    def __init__(self, max_masks=MAX_CACHED_FILTER_MASKS):
+        self.max_masks = max_masks
+        self.frames = ()
+        self.texts = {} # (frame number, column, case_sensitive) -> (codes, text, index of text, Arrow text or None)
+        self.masks = {} # (frame number, column, search) -> mask, least recently used first
+
+    def mask(self, df1, df2, side, column, search_value, search_type="exact", case_sensitive=False):
+        """Returns the search-filter mask of column in df1 (side 0) or df2 (side 1)."""
+        if len(self.frames) != 2 or self.frames[0] is not df1 or self.frames[1] is not df2:
+            self.frames = (df1, df2)
+            self.texts.clear()
+            self.masks.clear()
+        key = (side, column, search_value, search_type, case_sensitive)
+        mask = self.masks.pop(key, None)
+        if mask is None:
+            text_key = (side, column, case_sensitive)
+            if text_key not in self.texts:
+                codes, text = search_column_text(self.frames[side][column], case_sensitive)
+                arrow_text = None
+                if pa is not None:
+                    try:
+                        arrow_text = pa.array(text, type=pa.large_string())
+                    except (pa.ArrowException, UnicodeEncodeError): # e.g. lone surrogates
+                        pass
+                self.texts[text_key] = (codes, text, pd.Index(text), arrow_text)
+            codes, text, index, arrow_text = self.texts[text_key]
+            value = search_value if case_sensitive else search_value.lower()
+            if search_type == "exact":
+                positions = index.get_indexer_for([value])
+                matched = np.zeros(len(text), dtype=bool)
+                matched[positions[positions >= 0]] = True
+            elif search_type == "contains" and arrow_text is not None:
+                matched = pc.match_substring(arrow_text, value).to_numpy(zero_copy_only=False)
+            else:
+                matched = match_search_text(text, search_value, search_type, case_sensitive)
+            mask = matched[codes]
+            if len(self.masks) >= self.max_masks:
+                self.masks.pop(next(iter(self.masks)))
+        self.masks[key] = mask
+        return mask
+
+def format_display_rows(df, positions):
+    """
+    Formats the rows of df at the given positions for the grid and exports
+    (stripped strings, NaN as ''). A position of -1 yields an empty row.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    valid = positions >= 0
+    values = df.iloc[positions[valid]].to_numpy(dtype=object)
+    formatted = iter([[str(v).strip() if pd.notna(v) else '' for v in row] for row in values])
+    blank = [''] * len(df.columns)
+    return [next(formatted) if ok else list(blank) for ok in valid]
+
+class TaskCancelled(Exception):
+    """Raised inside a background task once the user has pressed Cancel."""
+
+class TaskProgress:
+    """
+    Progress of one background task. The worker thread reports into it and the
+    Tk thread polls snapshot() through after(). Every report() is also a
+    cancellation point: it raises TaskCancelled once cancel() has been called.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.phase = "Starting"
+        self.done = 0
+        self.total = None
+        self.phase_started = time.monotonic()
+
+    def report(self, phase, done=0, total=None):
+        """Records the current phase and how far it got (total=None if unknown)."""
+        with self._lock:
+            if phase != self.phase:
+                self.phase = phase
+                self.phase_started = time.monotonic()
+            self.done = done
+            self.total = total
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def snapshot(self):
+        """Returns (phase, done, total, eta_seconds); eta is None when unknown."""
+        with self._lock:
+            phase, done, total, started = self.phase, self.done, self.total, self.phase_started
+        eta = None
+        if total and done:
+            eta = (time.monotonic() - started) * (total - done) / done
+        return phase, done, total, eta
+
+def run_concurrently(progress, loads):
+    """
+    Runs loads, a list of (name, load) pairs, on threads of their own and
+    returns their results in order. Each load(report) reports like
+    read_full_file does, report(phase, rows_read), and progress gets one
+    phase listing every load, e.g. "File 1: 150,000 rows | File 2: done".
+    """
+    status = {name: "waiting" for name, _ in loads}
+    lock = threading.Lock()
+
+    def set_status(name, text):
+        with lock:
+            status[name] = text
+            phase = " | ".join(f"{n}: {t}" for n, t in status.items())
+        progress.report(phase)
+
+    def run(name, load):
+        result = load(lambda phase, done=0, total=None: set_status(name, f"{done:,} rows" if done else "reading"))
+        set_status(name, "done")
+        return result
+
+    with ThreadPoolExecutor(max_workers=len(loads)) as pool:
+        futures = [pool.submit(run, name, load) for name, load in loads]
+        return [future.result() for future in futures]
+
 class ToolTip:
     """
     A simple tooltip class to display information when hovering over a widget.
@@ -45,9 +1386,88 @@ class ToolTip:
 
 class ColorTreeview(ttk.Treeview):
     """
-    Custom Treeview class (currently a placeholder, but can be extended for coloring).
+    Virtual-scrolling Treeview for the results table. Only the rows of the
+    visible window exist as Treeview items; scrolling re-renders the window
+    from the row source, so any number of result rows costs the same to show.
+    Matched rows with differing compared columns are highlighted and their
+    differing cells are marked.
     """
-    pass
+    DIFF_MARKER = "\u2260 "
+
+    def __init__(self, master=None, **kw):
+        super().__init__(master, **kw)
+        self.tag_configure("diff", background="#FFF2CC")
+        self.row_count = 0
+        self.row_getter = None
+        self.first_row = 0
+        self.scrollbar = None
+        self.bind("<Configure>", lambda e: self.render())
+        self.bind("<MouseWheel>", lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.bind("<Prior>", lambda e: self.scroll_rows(-self.visible_rows()))
+        self.bind("<Next>", lambda e: self.scroll_rows(self.visible_rows()))
+
+    def attach_scrollbar(self, scrollbar):
+        """Drives scrollbar from the virtual row position instead of the Treeview items."""
+        self.scrollbar = scrollbar
+        scrollbar.configure(command=self.yview_rows)
+
+    def set_rows(self, row_count, row_getter):
+        """Shows row_count rows from the top; row_getter(i) returns (values, cell_diff_map) of row i."""
+        self.row_count = row_count
+        self.row_getter = row_getter
+        self.first_row = 0
+        self.render()
+
+    def visible_rows(self):
+        """Number of rows that fit in the widget below the heading."""
+        try:
+            row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        except (ValueError, tk.TclError):
+            row_height = 20
+        height = self.winfo_height()
+        if height <= 1: # Not mapped yet
+            return int(self.cget("height"))
+        return max(1, height // row_height - 1)
+
+    def render(self):
+        """Replaces the Treeview items with the rows of the current window."""
+        self.delete(*self.get_children())
+        window = self.visible_rows()
+        self.first_row = max(0, min(self.first_row, self.row_count - window))
+        last = min(self.row_count, self.first_row + window)
+        columns = self["columns"]
+        for i in range(self.first_row, last):
+            values, cell_diff_map = self.row_getter(i)
+            self.insert_result_row(values, columns, cell_diff_map)
+        if self.scrollbar is not None:
+            if self.row_count:
+                self.scrollbar.set(self.first_row / self.row_count, last / self.row_count)
+            else:
+                self.scrollbar.set(0, 1)
+
+    def yview_rows(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")."""
+        if args[0] == "moveto":
+            self.first_row = int(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            self.first_row += int(args[1]) * (self.visible_rows() if args[2] == "pages" else 1)
+        self.render()
+
+    def scroll_rows(self, n):
+        """Moves the window by n rows."""
+        self.first_row += n
+        self.render()
+        return "break"
+
+    def insert_result_row(self, values, columns, cell_diff_map):
+        """Inserts one results row, highlighting the cells listed in cell_diff_map."""
+        if not cell_diff_map:
+            return self.insert('', 'end', values=values)
+        marked = {f"File1_{h1}" for h1 in cell_diff_map} | {f"File2_{h2}" for h2 in cell_diff_map.values()}
+        values = [self.DIFF_MARKER + str(v) if col in marked else v for col, v in zip(columns, values)]
+        return self.insert('', 'end', values=values, tags=("diff",))
 
 class MappingSearchSBSApp:
     """
@@ -149,6 +1569,39 @@ class MappingSearchSBSApp:
         self.max_display_entry.pack(anchor="w", padx=2, pady=1)
         ToolTip(self.max_display_entry, "Maximum number of rows to display in the results table.")
 
+        # --- COMPARISON ENGINE ---
+        engine_frame = tk.LabelFrame(options_frame, text="Comparison Engine", font=('Arial', 11, 'bold'))
+        engine_frame.pack(side="left", padx=(0,14), pady=(0,8), fill="y")
+        self.compare_mode = tk.StringVar(value="memory")
+        ttk.Radiobutton(engine_frame, text="In memory", variable=self.compare_mode, value="memory").pack(anchor="w", pady=1)
+        ttk.Radiobutton(engine_frame, text="Disk-backed (larger than RAM)", variable=self.compare_mode, value="disk").pack(anchor="w", pady=1)
+        # Experimental: no speedup over in-memory mode has been measured yet, and it has none on one core
+        multi_core = (os.cpu_count() or 1) > 1
+        ttk.Radiobutton(engine_frame, text="Parallel (experimental)", variable=self.compare_mode, value="parallel",
+                        state="normal" if multi_core else "disabled").pack(anchor="w", pady=1)
+        ttk.Radiobutton(engine_frame, text="Streaming to file", variable=self.compare_mode, value="stream").pack(anchor="w", pady=1)
+        ToolTip(engine_frame, "Disk-backed mode reads both files from disk in partitions instead of comparing the loaded data. "
+                              "Parallel mode (experimental, multi-core machines only) splits the loaded data by key across "
+                              "worker processes; it is not yet known to be faster than in-memory mode. "
+                              "Streaming mode reads the files in chunks and writes all results directly to an export file.")
+
+        tk.Label(engine_frame, text="Memory Limit (MB):").pack(anchor="w", pady=(5,0))
+        self.memory_limit_mb = IntVar(value=1024)
+        self.memory_limit_entry = tk.Entry(engine_frame, textvariable=self.memory_limit_mb, width=10)
+        self.memory_limit_entry.pack(anchor="w", padx=2, pady=1)
+        ToolTip(self.memory_limit_entry, "Approximate memory ceiling per partition in disk-backed mode.")
+
+        tk.Label(engine_frame, text="Workers:").pack(anchor="w", pady=(5,0))
+        self.worker_count = IntVar(value=os.cpu_count() or 1)
+        self.worker_count_entry = tk.Entry(engine_frame, textvariable=self.worker_count, width=10)
+        self.worker_count_entry.pack(anchor="w", padx=2, pady=1)
+        ToolTip(self.worker_count_entry, "Number of worker processes used in parallel mode.")
+
+        self.use_key_cache = tk.BooleanVar(value=True)
+        key_cache_check = ttk.Checkbutton(engine_frame, text="Cache key index on disk", variable=self.use_key_cache)
+        key_cache_check.pack(anchor="w", pady=(5,1))
+        ToolTip(key_cache_check, "Reuses the key index of a file that has not changed since the last comparison.")
+
 
         self.match_count_label = tk.Label(search_frame, text="Matching: 0 | Non-matching: 0", font=('Arial', 10, 'bold'))
         self.match_count_label.grid(row=2, column=0, columnspan=7, pady=(4,0), sticky="w")
@@ -162,24 +1615,55 @@ class MappingSearchSBSApp:
         tk.Checkbutton(filter_frame, text="Show Non-matches", variable=self.show_nonmatches, command=self.refresh_grid).pack(side="left", padx=6)
         ToolTip(filter_frame, "Toggle the display of matched and unmatched rows in the results table.")
 
+        # --- PROGRESS ---
+        # Comparisons, full loads and exports run in the background and report here
+        progress_frame = tk.Frame(root)
+        progress_frame.pack(padx=14, pady=(0,5), fill="x")
+        self.progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=260, mode="determinate")
+        self.progress_bar.pack(side="left")
+        self.cancel_btn = tk.Button(progress_frame, text="Cancel", command=self.cancel_task, width=10, state="disabled")
+        self.cancel_btn.pack(side="left", padx=8)
+        self.progress_label = tk.Label(progress_frame, text="", anchor="w")
+        self.progress_label.pack(side="left", fill="x", expand=True)
+        ToolTip(self.cancel_btn, "Stops the running comparison, load or export at its next checkpoint.")
+
         # --- RESULTS TABLE ---
         grid_frame = tk.LabelFrame(root, text="Step 4: Results Table", font=('Arial', 11, 'bold'))
         grid_frame.pack(padx=14, pady=8, fill="both", expand=True)
         self.grid = ColorTreeview(grid_frame, show="headings", selectmode="browse")
         self.grid.pack(side="left", fill="both", expand=True)
-        grid_scroll = ttk.Scrollbar(grid_frame, orient="vertical", command=self.grid.yview)
+        grid_scroll = ttk.Scrollbar(grid_frame, orient="vertical")
         grid_scroll.pack(side="right", fill="y")
-        self.grid.configure(yscrollcommand=grid_scroll.set)
+        self.grid.attach_scrollbar(grid_scroll) # The grid only renders the visible rows
 
         # --- EXPORTS ---
         export_frame = tk.Frame(root)
         export_frame.pack(padx=14, pady=(0,10), fill='x')
         tk.Button(export_frame, text="Export Matched to Excel", command=lambda: self.export_to_excel(only_matches=True), width=20).pack(side="left", padx=10)
         tk.Button(export_frame, text="Export Non-matched to Excel", command=lambda: self.export_to_excel(only_matches=False), width=22).pack(side="left", padx=10)
+        tk.Button(export_frame, text="Export Differences to Excel", command=lambda: self.export_to_excel(differences_only=True), width=22).pack(side="left", padx=10)
         tk.Button(export_frame, text="Load Full File for Export", command=self.load_full_files, width=23).pack(side="left", padx=16)
+        tk.Button(export_frame, text="Columns to Load...", command=self.choose_payload_columns, width=16).pack(side="left")
 
         self.grid_content = [] # Stores the data to be displayed in the grid
         self.grid_columns = [] # Stores the column headers for the grid
+        self.comparison_result = None # Index arrays from the last comparison
+        self.grid_positions = None # File positions (pos1, pos2) of the grid_content rows
+        self.payload_columns1 = None # Columns chosen in "Columns to Load", None for all
+        self.payload_columns2 = None
+        self.projected_file1 = None # File df1 was read from when only some columns were loaded
+        self.projected_file2 = None
+        self.source_file1 = None # File df1 was actually read from, which keys the KeyIndexCache
+        self.source_file2 = None
+        self.key_index_cache = KeyIndexCache() # On-disk key indexes of unchanged input files
+        self.worker_pool = WorkerPool() # Worker processes reused by every parallel search
+        self.sidecar_cache = SidecarCache() # Parquet copies of input files already parsed in full
+        self.join_cache = None # Unfiltered join of the loaded files, see JoinCache
+        self.search_filter_cache = SearchFilterCache() # Search-column indexes and recent filter masks
+        self.executor = ThreadPoolExecutor(max_workers=1) # Runs comparisons, full loads and exports
+        self.current_task = None # TaskProgress of the running background task
+        # Stop a running task when the window goes away instead of keeping the process alive
+        self.root.bind("<Destroy>", lambda e: self.current_task.cancel() if e.widget is self.root and self.current_task else None, add="+")
 
     def load_file1(self):
         """Opens a file dialog to select File 1 and updates the entry field."""
@@ -199,19 +1683,37 @@ class MappingSearchSBSApp:
 
     def reload_headers(self):
         """
-        Loads preview data from selected files, extracts headers, and initializes
-        the column mapping section.
+        Reads only the header row of the selected files and initializes the
+        column mapping section. The data itself is loaded when Search is pressed.
         """
-        self.df1 = self.read_file(self.file1_entry.get())
-        self.df2 = self.read_file(self.file2_entry.get())
+        path1, path2 = self.file1_entry.get(), self.file2_entry.get()
+        if not path1 or not path2:
+            messagebox.showerror("Error", "Please select both files first.")
+            return
+        try:
+            headers1 = read_columns(path1)
+            headers2 = read_columns(path2)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to read headers:\n{e}")
+            return
 
-        if self.df1 is None or self.df2 is None or self.df1.empty or self.df2.empty:
+        if not headers1 or not headers2:
             messagebox.showerror("Error", "Both files must load successfully and contain data.")
             return
 
-        self.headers1 = list(self.df1.columns)
-        self.headers2 = list(self.df2.columns)
+        # New headers start over with every column loaded, and no data until Search
+        self.df1 = self.df2 = None
+        self.payload_columns1 = self.payload_columns2 = None
+        self.projected_file1 = self.projected_file2 = None
+        self.source_file1 = self.source_file2 = None
+        self.headers1, self.headers2 = headers1, headers2
+        self.init_mapping()
 
+    def init_mapping(self):
+        """
+        Initializes the column mapping section from self.headers1 and
+        self.headers2, auto-mapping columns with similar names.
+        """
         self.clear_mapping_rows()
         self.add_mapping_btn.config(state="normal")
         self.mapfield_combo['values'] = [] # Clear search field options
@@ -233,16 +1735,11 @@ class MappingSearchSBSApp:
         if auto_mapped_count == 0 and (self.headers1 and self.headers2):
             self.add_mapping_row()
 
-        # Display preview mode notices if applicable
-        if hasattr(self.df1, '__len__') and len(self.df1) == self.max_preview_rows:
-            messagebox.showinfo("Notice", f"Preview mode: Only first {self.max_preview_rows} rows loaded from File 1.")
-        if hasattr(self.df2, '__len__') and len(self.df2) == self.max_preview_rows:
-            messagebox.showinfo("Notice", f"Preview mode: Only first {self.max_preview_rows} rows loaded from File 2.")
-
     def read_file(self, path):
         """
         Reads data from a given file path, handling CSV, Excel, and TXT formats.
-        Applies a preview limit for large files.
+        Applies a preview limit for large files. Runs on the background executor,
+        so read errors are raised rather than shown.
         """
         if not path:
             return None
@@ -264,7 +1761,7 @@ class MappingSearchSBSApp:
                     else:
                         return pd.DataFrame() # Return empty DataFrame if no data
                 else:
-                    df = pd.read_csv(path, dtype=str)
+                    df = self.sidecar_cache.read(path, lambda usecols: read_csv_file(path, usecols=usecols))
                     return df
             elif ext == ".xlsx":
                 # For very large Excels, read only nrows for preview
@@ -272,7 +1769,7 @@ class MappingSearchSBSApp:
                     df = pd.read_excel(path, dtype=str, nrows=self.max_preview_rows)
                     return df
                 else:
-                    df = pd.read_excel(path, dtype=str)
+                    df = self.sidecar_cache.read(path, lambda usecols: read_excel_sheet(path, usecols))
                     return df
             elif ext == ".txt":
                 # Try reading as CSV, then as tab-separated if first fails
@@ -283,10 +1780,9 @@ class MappingSearchSBSApp:
                     df = pd.read_csv(path, sep="\t", dtype=str, nrows=self.max_preview_rows)
                     return df
             else:
-                messagebox.showerror("Error", f"Unsupported file extension: {ext}")
+                raise ValueError(f"Unsupported file extension: {ext}")
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to read {path}:\n{e}")
-        return None
+            raise ValueError(f"Failed to read {path}:\n{e}") from e
 
     def clear_mapping_rows(self):
         """Removes all dynamically added column mapping rows."""
@@ -341,9 +1837,10 @@ class MappingSearchSBSApp:
         """
         Performs the comparison and search operation based on selected files,
         column mappings, and search criteria. Populates the results grid.
-        This version is optimized for memory by avoiding a full pandas merge.
+        The join itself runs column-wise in compare_frames; only the rows that
+        end up in the grid are formatted individually.
         """
-        if self.df1 is None or self.df2 is None:
+        if not self.headers1 or not self.headers2:
             messagebox.showerror("Error", "Please load both files before searching.")
             return
 
@@ -386,226 +1883,284 @@ class MappingSearchSBSApp:
         print(f"DEBUG: do_search - search_field: '{search_field}', search_value: '{search_value}', is_search_active: {is_search_active}")
 
 
-        # Helper function to apply search filter to a single cell value
-        def apply_search_filter(cell_value, value_to_match, search_type, case_sensitive):
-            cell_value_str = str(cell_value).strip()
-            
-            if not case_sensitive:
-                cell_value_str = cell_value_str.lower()
-                value_to_match = value_to_match.lower()
-
-            result = False
-            if search_type == "exact":
-                result = cell_value_str == value_to_match
-            elif search_type == "contains":
-                result = value_to_match in cell_value_str
-            elif search_type == "regex":
-                try:
-                    result = re.fullmatch(value_to_match, cell_value_str) is not None
-                except re.error as e:
-                    messagebox.showerror("Regex Error", f"Invalid regex pattern: {value_to_match}\nError: {e}")
-                    result = False
-            return result
-
-        # --- Step 1: Pre-index df2 for efficient lookups ---
-        # df2_key_to_rows will map composite keys to a list of (original_index, row_data) tuples
-        df2_key_to_rows = {}
-        for idx2, row2 in self.df2.iterrows():
-            composite_key_values = []
-            for _, k2 in mapping_keys:
-                # Get value, handle missing columns and NaN, then strip
-                val = row2.get(k2, '')
-                composite_key_values.append(str(val).strip() if pd.notna(val) else '')
-            composite_key = tuple(composite_key_values)
-            df2_key_to_rows.setdefault(composite_key, []).append((idx2, row2))
-        
-        print(f"DEBUG: df2_key_to_rows created with {len(df2_key_to_rows)} unique keys.")
-
-        # --- Step 2: Initialize results and tracking sets ---
-        self.grid_content = []
-        match_count = 0
-        nonmatch_count = 0
-        displayed_rows = 0
-
-        # Sets to track original indices that have been processed to ensure uniqueness for counts/display
-        processed_file1_original_indices = set()
-        processed_file2_original_indices = set()
-        
-        # Store all potential rows to be displayed, then filter by current_max_display
-        # This helps ensure counts are accurate even if not all rows are displayed.
-        all_display_candidates = []
-
-        # --- Step 3: Iterate through df1 to find matches and File 1 Only rows ---
-        for idx1, row1 in self.df1.iterrows():
-            composite_key_values = []
-            for k1, _ in mapping_keys:
-                val = row1.get(k1, '')
-                composite_key_values.append(str(val).strip() if pd.notna(val) else '')
-            composite_key = tuple(composite_key_values)
-
-            # Determine if this File 1 row meets the search criteria
-            row1_meets_search_criteria = True # Assume it meets criteria by default
-            if is_search_active: # Only apply filter if a search is active
-                if search_field in cols1: # ONLY apply filter if search_field exists in File 1 headers
-                    if not apply_search_filter(row1.get(search_field, ''), search_value, search_type, case_sensitive):
-                        row1_meets_search_criteria = False
-                        # print(f"DEBUG: File 1 row {idx1} skipped - search filter mismatch on '{search_field}' (value: '{row1.get(search_field, '')}').")
-                # else: If search_field is active but not in cols1, row1_meets_search_criteria remains True
-                # This means the search filter doesn't apply to this side, so it's not filtered out.
-            
-            if not row1_meets_search_criteria:
-                continue # Skip this File 1 row if it doesn't meet search criteria
-
-            # Look for matches in df2
-            df2_matches = df2_key_to_rows.get(composite_key, [])
-
-            if df2_matches:
-                # This File 1 row has at least one match in File 2
-                if self.count_option.get() == 1: # All matching pairs
-                    for idx2, row2 in df2_matches:
-                        # Determine if this File 2 match meets the search criteria
-                        row2_meets_search_criteria = True
-                        if is_search_active: # Only apply filter if a search is active
-                            if search_field in cols2: # ONLY apply filter if search_field exists in File 2 headers
-                                if not apply_search_filter(row2.get(search_field, ''), search_value, search_type, case_sensitive):
-                                    row2_meets_search_criteria = False
-                                    # print(f"DEBUG: Matched File 2 row {idx2} skipped - search filter mismatch on '{search_field}' (value: '{row2.get(search_field, '')}').")
-                            # else: If search_field is active but not in cols2, row2_meets_search_criteria remains True
-                        
-                        # A match is added only if BOTH sides meet their respective search criteria (or if filter doesn't apply)
-                        if row1_meets_search_criteria and row2_meets_search_criteria:
-                            all_display_candidates.append(("Match", row1, row2, True, idx1, idx2))
-                            # print(f"DEBUG: Added Match (Option 1) for File 1 idx {idx1}, File 2 idx {idx2}.")
-                            # Mark both indices as processed for uniqueness tracking
-                            processed_file1_original_indices.add(idx1)
-                            processed_file2_original_indices.add(idx2)
-                
-                elif self.count_option.get() == 2: # Unique matched File 1 rows
-                    if idx1 not in processed_file1_original_indices:
-                        # Find at least one matching row from df2 that also meets search criteria
-                        valid_df2_match_found = False
-                        idx2_to_display = None
-                        row2_to_display = pd.Series(dtype=str)
-
-                        for idx2_cand, row2_cand in df2_matches:
-                            row2_cand_meets_criteria = True
-                            if is_search_active:
-                                if search_field in cols2:
-                                    if not apply_search_filter(row2_cand.get(search_field, ''), search_value, search_type, case_sensitive):
-                                        row2_cand_meets_criteria = False
-                                else:
-                                    # If search_field not in cols2, it passes for this side
-                                    pass 
-                            
-                            if row2_cand_meets_criteria:
-                                valid_df2_match_found = True
-                                idx2_to_display = idx2_cand
-                                row2_to_display = row2_cand
-                                break # Found a valid match, no need to check others
-
-                        if valid_df2_match_found:
-                            all_display_candidates.append(("Match", row1, row2_to_display, True, idx1, idx2_to_display))
-                            # print(f"DEBUG: Added Match (Option 2) for File 1 idx {idx1}, File 2 idx {idx2_to_display}.")
-                            processed_file1_original_indices.add(idx1)
-                            # Mark all associated df2 indices as processed to avoid them becoming "File 2 Only"
-                            for df2_match_idx, _ in df2_matches:
-                                processed_file2_original_indices.add(df2_match_idx)
-
-                elif self.count_option.get() == 3: # Unique matched File 2 rows
-                    # For this option, we need to iterate through df2_matches and add if df2_idx is unique
-                    for idx2, row2 in df2_matches:
-                        if idx2 not in processed_file2_original_indices:
-                            # Determine if this File 2 match meets the search criteria
-                            row2_meets_search_criteria = True
-                            if is_search_active: # Only apply filter if a search is active
-                                if search_field in cols2: # ONLY apply filter if search_field exists in File 2 headers
-                                    if not apply_search_filter(row2.get(search_field, ''), search_value, search_type, case_sensitive):
-                                        row2_meets_search_criteria = False
-                                        # print(f"DEBUG: Unique matched File 2 row {idx2} skipped - search filter mismatch.")
-                                else:
-                                    # If search_field is active but not in cols2, row2_meets_search_criteria remains True
-                                    pass
-                            
-                            # A match is added only if BOTH sides meet their respective search criteria (or if filter doesn't apply)
-                            if row1_meets_search_criteria and row2_meets_search_criteria:
-                                all_display_candidates.append(("Match", row1, row2, True, idx1, idx2))
-                                # print(f"DEBUG: Added Match (Option 3) for File 1 idx {idx1}, File 2 idx {idx2}.")
-                                processed_file1_original_indices.add(idx1) # Mark File 1 row as processed
-                                processed_file2_original_indices.add(idx2) # Mark this specific File 2 row as processed
-
-            else: # No match found for this File 1 row (it's a potential File 1 Only row)
-                if idx1 not in processed_file1_original_indices: # Ensure it's not already handled
-                    # The row1_meets_search_criteria is already checked above for File 1 Only rows
-                    all_display_candidates.append(("File 1 Only", row1, pd.Series(dtype=str), False, idx1, None))
-                    # print(f"DEBUG: Added File 1 Only for idx {idx1}.")
-                    processed_file1_original_indices.add(idx1)
-
-
-        # --- Step 4: Iterate through df2 to find File 2 Only rows ---
-        for idx2, row2 in self.df2.iterrows():
-            if idx2 not in processed_file2_original_indices:
-                # This df2 row was not part of any match found in the df1 iteration
-                
-                # Determine if this File 2 Only row meets the search criteria
-                row2_meets_search_criteria = True
-                if is_search_active: # Only apply filter if a search is active
-                    if search_field in cols2: # ONLY apply filter if search_field exists in File 2 headers
-                        if not apply_search_filter(row2.get(search_field, ''), search_value, search_type, case_sensitive):
-                            row2_meets_search_criteria = False
-                            # print(f"DEBUG: File 2 Only row {idx2} skipped - search filter mismatch.")
-                    else: # Search field not in File 2 headers, so it passes for this side
-                        pass
-                
-                if row2_meets_search_criteria:
-                    all_display_candidates.append(("File 2 Only", pd.Series(dtype=str), row2, False, None, idx2))
-                    # print(f"DEBUG: Added File 2 Only for idx {idx2}.")
-                    processed_file2_original_indices.add(idx2) # Mark as processed
-
-        print(f"DEBUG: Total display candidates before current_max_display: {len(all_display_candidates)}")
-
-        # --- Step 5: Finalize grid_content and counts based on current_max_display and filters ---
-        # Reset counts for final calculation based on what will actually be displayed
-        final_match_count = 0
-        final_nonmatch_count = 0
-        
-        # Helper to format cell values, replacing NaN with empty string
-        def format_cell_value_for_display(val):
-            return str(val).strip() if pd.notna(val) else ''
+        # --- Step 1: Build the search filter ---
+        # The filter is compiled once and applied to the whole search column of a
+        # side whose headers contain the search field, before the join runs.
+        try:
+            column_filter = compile_search_filter(search_value, search_type, case_sensitive)
+        except re.error as e:
+            messagebox.showerror("Regex Error", f"Invalid regex pattern: {search_value}\nError: {e}")
+            return
 
-        for item in all_display_candidates:
-            source_tag, row1_data, row2_data, is_match, _, _ = item
-            
-            # Apply display filters (Show Matches/Show Non-matches checkboxes)
-            if is_match and not self.show_matches.get():
-                continue
-            if not is_match and not self.show_nonmatches.get():
-                continue
-            
-            if displayed_rows >= current_max_display: # Use user-defined limit
-                break # Stop adding if current_max_display is reached
+        # --- Step 2: Vectorized join on the composite key ---
+        # Everything the background work needs is read from the widgets here, on the Tk thread.
+        compare_mode = self.compare_mode.get()
+        filter_column = search_field if is_search_active else None
+        if compare_mode == "stream":
+            self.run_streaming_comparison(mapping_keys, filter_column, column_filter)
+            return
+        path1, path2 = self.file1_entry.get(), self.file2_entry.get()
+        if compare_mode == "disk":
+            try:
+                memory_limit = int(self.memory_limit_mb.get())
+                if memory_limit <= 0:
+                    raise ValueError
+            except (ValueError, tk.TclError):
+                messagebox.showerror("Invalid Input", "Memory Limit must be a positive integer.")
+                return
+        workers = 1
+        if compare_mode == "parallel":
+            try:
+                workers = int(self.worker_count.get())
+                if workers <= 0:
+                    raise ValueError
+            except (ValueError, tk.TclError):
+                messagebox.showerror("Invalid Input", "Workers must be a positive integer.")
+                return
+        # The task works on local copies of the loaded state and returns what it loaded or built,
+        # which show_results stores on the Tk thread
+        df1, df2 = self.df1, self.df2
+        source_file1, source_file2 = self.source_file1, self.source_file2
+        join_cache = self.join_cache
+        headers1, headers2 = list(self.headers1), list(self.headers2)
+        projected_file1, projected_file2 = self.projected_file1, self.projected_file2
+        count_option = self.count_option.get()
+        show_matches, show_nonmatches = self.show_matches.get(), self.show_nonmatches.get()
+        key_cache = self.key_index_cache if self.use_key_cache.get() else None
+        previews = [] # Files whose preview load hit the preview limit
+
+        def load_preview(path, headers, report, name):
+            report(f"Loading {name}")
+            df = self.read_file(path)
+            if df is None or df.empty:
+                raise ValueError(f"{path} contains no data.")
+            if len(df.columns) == len(headers):
+                df.columns = headers # Keep the names the mapping was made on
+            if len(df) == self.max_preview_rows:
+                previews.append(name)
+            return df
+
+        def compare(progress):
+            nonlocal df1, df2, source_file1, source_file2, join_cache
+            if compare_mode == "disk":
+                progress.report("Reading files")
+                result = compare_files_partitioned(path1, path2, mapping_keys, count_option, filter_column,
+                                                   column_filter, memory_limit, progress=progress.report)
+            else:
+                # Load & Map Columns only read the headers; the preview data is read here once,
+                # both files at the same time
+                loads = []
+                if df1 is None:
+                    loads.append(("File 1", lambda report: load_preview(path1, headers1, report, "File 1")))
+                if df2 is None:
+                    loads.append(("File 2", lambda report: load_preview(path2, headers2, report, "File 2")))
+                if loads:
+                    loaded = dict(zip([name for name, _ in loads], run_concurrently(progress, loads)))
+                    df1 = loaded.get("File 1", df1)
+                    df2 = loaded.get("File 2", df2)
+                    if "File 1" in loaded:
+                        source_file1 = path1
+                    if "File 2" in loaded:
+                        source_file2 = path2
+                # A projected load may lack columns mapped after it; fetch just those
+                needed1 = [k1 for k1, _ in mapping_keys] + ([search_field] if is_search_active else [])
+                needed2 = [k2 for _, k2 in mapping_keys] + ([search_field] if is_search_active else [])
+                if projected_file1:
+                    df1 = self.add_missing_columns(df1, projected_file1, headers1, needed1, progress, "Loading File 1 columns")
+                if projected_file2:
+                    df2 = self.add_missing_columns(df2, projected_file2, headers2, needed2, progress, "Loading File 2 columns")
+                progress.report("Applying search filter")
+                filter_cache = self.search_filter_cache
+                mask1 = mask2 = None
+                if is_search_active and search_field in cols1:
+                    mask1 = filter_cache.mask(df1, df2, 0, search_field, search_value, search_type, case_sensitive)
+                if is_search_active and search_field in cols2:
+                    mask2 = filter_cache.mask(df1, df2, 1, search_field, search_value, search_type, case_sensitive)
+
+                def join(count_option, mask1=None, mask2=None):
+                    progress.report("Joining on the composite key")
+                    if compare_mode == "parallel":
+                        return compare_frames_parallel(df1, df2, mapping_keys, count_option, mask1, mask2, workers, codes,
+                                                       self.worker_pool)
+                    return compare_frames(df1, df2, mapping_keys, count_option, mask1, mask2, codes)
+
+                # The unfiltered join is cached, so a new search filter only post-filters its index arrays
+                if join_cache is None or not join_cache.is_for(df1, df2, mapping_keys):
+                    join_cache = None
+                    column_index = column_key_index
+                    if compare_mode == "parallel":
+                        column_index = lambda df, col: column_key_index_parallel(df, col, self.worker_pool, workers)
+                    # Keyed on the files the frames came from, which the entry fields may no longer name
+                    codes = encode_mapping_keys(df1, df2, mapping_keys, key_cache, source_file1, source_file2,
+                                                progress.report, column_index)
+                    if count_key_pairs(*codes) <= MAX_CACHED_PAIRS:
+                        full = join(1)
+                        join_cache = JoinCache(df1, df2, mapping_keys, codes[0], codes[1], full.left, full.right)
+                else:
+                    print("DEBUG: Reusing cached join, applying the search filter only")
 
-            # Apply the NaN removal here
-            v_f1 = [format_cell_value_for_display(row1_data.get(h, '')) for h in cols1]
-            v_f2 = [format_cell_value_for_display(row2_data.get(h, '')) for h in cols2]
-            
-            self.grid_content.append((source_tag, v_f1, v_f2, is_match, {}))
-            displayed_rows += 1
+                if join_cache is not None:
+                    result = join_cache.result(count_option, mask1, mask2)
+                else:
+                    result = join(count_option, mask1, mask2)
+                # Cell differences are computed below, for the displayed pairs only
+                result.diff_pairs = diff_column_pairs(list(df1.columns), list(df2.columns), mapping_keys)
+            print(f"DEBUG: Matches: {result.match_count}, File 1 Only: {len(result.left_only)}, File 2 Only: {len(result.right_only)}")
+
+            # --- Step 3: Finalize grid_content and counts based on current_max_display and filters ---
+            progress.report("Preparing results")
+            pos1, pos2, is_match, match_index = result.display_order(show_matches, show_nonmatches)
+            pos1, pos2, is_match, match_index = (pos1[:current_max_display], pos2[:current_max_display],
+                                                 is_match[:current_max_display], match_index[:current_max_display])
+            if compare_mode == "disk":
+                # Only the displayed rows are read back from the files, so differences are computed for those rows only
+                rows_at1 = read_rows_at(path1, pos1)
+                rows_at2 = read_rows_at(path2, pos2)
+                local1 = rows_at1.index.get_indexer(pos1)
+                local2 = rows_at2.index.get_indexer(pos2)
+                rows1 = format_display_rows(rows_at1, local1)
+                rows2 = format_display_rows(rows_at2, local2)
+                result.diff_pairs = diff_column_pairs(list(rows_at1.columns), list(rows_at2.columns), mapping_keys)
+                display_bits = compute_diff_bits(rows_at1, rows_at2, local1[is_match], local2[is_match], result.diff_pairs)
+                grid_headers = (list(rows_at1.columns), list(rows_at2.columns))
+            else:
+                rows1 = format_display_rows(df1, pos1)
+                rows2 = format_display_rows(df2, pos2)
+                display_bits = compute_diff_bits(df1, df2, pos1[is_match], pos2[is_match], result.diff_pairs, progress.report)
+                grid_headers = (list(df1.columns), list(df2.columns))
+            match_diff_maps = iter(diff_maps(display_bits, result.diff_pairs))
+
+            grid_content = []
+            for v_f1, v_f2, p1, matched in zip(rows1, rows2, pos1, is_match):
+                if matched:
+                    source_tag = "Match"
+                    cell_diff_map = next(match_diff_maps)
+                else:
+                    source_tag = "File 1 Only" if p1 >= 0 else "File 2 Only"
+                    cell_diff_map = {}
+                grid_content.append((source_tag, v_f1, v_f2, bool(matched), cell_diff_map))
+            loaded_state = (df1, df2, source_file1, source_file2, join_cache)
+            return result, grid_content, (pos1, pos2), grid_headers, int(is_match.sum()), loaded_state
+
+        def show_results(outcome):
+            result, grid_content, grid_positions, grid_headers, final_match_count, loaded_state = outcome
+            self.df1, self.df2, self.source_file1, self.source_file2, self.join_cache = loaded_state
+            self.comparison_result = result
+            self.grid_content = grid_content
+            self.grid_positions = grid_positions
+            shown = len(grid_content)
+            final_nonmatch_count = shown - final_match_count
+            final_diff_count = sum(1 for gc in self.grid_content if gc[4])
+            print(f"DEBUG: Final match_count: {final_match_count}")
+            print(f"DEBUG: Final nonmatch_count: {final_nonmatch_count}")
+            print(f"DEBUG: Displayed matched pairs with differences: {final_diff_count}")
+            print(f"DEBUG: Length of grid_content for display: {len(self.grid_content)}")
+
+            # Configure grid columns from the loaded columns (a projected load shows only those)
+            self.grid_columns = ['Source'] + [f"File1_{h}" for h in grid_headers[0]] + [f"File2_{h}" for h in grid_headers[1]]
+            print(f"DEBUG: Grid Columns: {self.grid_columns}")
+
+            self.refresh_grid()
+            self.match_count_label.config(text=f"Matching: {final_match_count} | Non-matching: {final_nonmatch_count} | With differences: {final_diff_count}")
+            for name in sorted(previews):
+                messagebox.showinfo("Notice", f"Preview mode: Only first {self.max_preview_rows} rows loaded from {name}.")
+
+        self.run_in_background("Comparison", compare, show_results)
+
+    def run_streaming_comparison(self, mapping_keys, filter_column, column_filter):
+        """
+        Compares the selected files chunk by chunk and writes every result row
+        straight to an export file chosen by the user; the grid is not filled.
+        """
+        export_path = filedialog.asksaveasfilename(
+            title="Stream Comparison Results To",
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx"), ("All Files", "*.*")]
+        )
+        if not export_path:
+            return
+        path1, path2 = self.file1_entry.get(), self.file2_entry.get()
+        count_option = self.count_option.get()
 
-            if is_match:
-                final_match_count += 1
+        def stream(progress):
+            try:
+                return compare_files_streaming(path1, path2, mapping_keys, export_path, count_option,
+                                               filter_column, column_filter, progress=progress.report)
+            except TaskCancelled:
+                # Do not leave a half-written export behind
+                if os.path.exists(export_path):
+                    os.remove(export_path)
+                raise
+
+        def streamed(counts):
+            match_count, file1_only, file2_only = counts
+            self.comparison_result = None
+            self.grid_content = []
+            self.grid_positions = None
+            self.clear_grid()
+            self.match_count_label.config(text=f"Matching: {match_count} | Non-matching: {file1_only + file2_only}")
+            messagebox.showinfo("Exported", f"Comparison results written to {export_path}\n"
+                                            f"Matches: {match_count}, File 1 Only: {file1_only}, File 2 Only: {file2_only}")
+
+        self.run_in_background("Streaming comparison", stream, streamed)
+
+    def run_in_background(self, title, work, on_done):
+        """
+        Runs work(progress) on the background executor, with progress a
+        TaskProgress, and polls it from the Tk loop to drive the progress bar.
+        on_done(result) runs on the Tk thread once work returns; errors are
+        reported as "<title> failed" and a cancelled task is simply dropped.
+        Only one task runs at a time.
+        """
+        if self.current_task is not None:
+            messagebox.showwarning("Busy", "Another operation is still running. Wait for it to finish or cancel it first.")
+            return
+        progress = TaskProgress()
+        future = self.executor.submit(work, progress)
+        self.current_task = progress
+        self.cancel_btn.config(state="normal")
+        self.progress_label.config(text=f"{title}: starting...")
+        self.root.after(100, self._poll_background_task, title, progress, future, on_done)
+
+    def _poll_background_task(self, title, progress, future, on_done):
+        """Updates the progress bar until the task finishes, then hands over its result."""
+        if not future.done():
+            phase, done, total, eta = progress.snapshot()
+            if progress.cancelled:
+                text = f"{title}: cancelling..."
+            elif total:
+                self.progress_bar.config(mode="determinate", maximum=total, value=done)
+                text = f"{title}: {phase} ({done:,} of {total:,})"
+                if eta is not None:
+                    text += f", about {math.ceil(eta)}s left"
             else:
-                final_nonmatch_count += 1
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.step(5)
+                text = f"{title}: {phase} ({done:,} rows)" if done else f"{title}: {phase}..."
+            self.progress_label.config(text=text)
+            self.root.after(100, self._poll_background_task, title, progress, future, on_done)
+            return
 
-        print(f"DEBUG: Final match_count: {final_match_count}")
-        print(f"DEBUG: Final nonmatch_count: {final_nonmatch_count}")
-        print(f"DEBUG: Length of grid_content for display: {len(self.grid_content)}")
+        self.current_task = None
+        self.cancel_btn.config(state="disabled")
+        self.progress_bar.config(mode="determinate", value=0)
+        try:
+            result = future.result()
+        except TaskCancelled:
+            self.progress_label.config(text=f"{title} cancelled.")
+            return
+        except Exception as e:
+            self.progress_label.config(text=f"{title} failed.")
+            messagebox.showerror("Error", f"{title} failed:\n{e}")
+            return
+        self.progress_label.config(text=f"{title} finished.")
+        on_done(result)
 
-        # Configure grid columns
-        self.grid_columns = ['Source'] + [f"File1_{h}" for h in self.headers1] + [f"File2_{h}" for h in self.headers2]
-        print(f"DEBUG: Grid Columns: {self.grid_columns}")
-        
-        self.refresh_grid()
-        self.match_count_label.config(text=f"Matching: {final_match_count} | Non-matching: {final_nonmatch_count}")
+    def cancel_task(self):
+        """Asks the running background task to stop at its next progress report."""
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.progress_label.config(text="Cancelling...")
 
     def refresh_grid(self):
         """
@@ -622,8 +2177,7 @@ class MappingSearchSBSApp:
             self.grid.heading(col, text=col)
             self.grid.column(col, width=120, anchor='w')
 
-        inserted_count = 0
-        # Use the user-defined max_display_rows for the actual grid insertion limit
+        # Use the user-defined max_display_rows for the number of rows shown
         try:
             display_limit = int(self.max_display_rows.get())
             if display_limit <= 0:
@@ -631,6 +2185,7 @@ class MappingSearchSBSApp:
         except ValueError:
             display_limit = 1000 # Default to 1000 if invalid input
 
+        rows = []
         for gc in self.grid_content:
             source, v_f1, v_f2, is_match, cell_diff_map = gc
             
@@ -641,19 +2196,22 @@ class MappingSearchSBSApp:
             if not is_match and not self.show_nonmatches.get():
                 continue
             
-            values = [source] + list(v_f1) + list(v_f2) # Ensure values are in list format
-            
             # Basic validation: ensure number of values matches number of columns
-            if len(values) != len(self.grid_columns):
-                print(f"WARNING: Row value count ({len(values)}) does not match column count ({len(self.grid_columns)}) for row: {values[:5]}...")
+            if 1 + len(v_f1) + len(v_f2) != len(self.grid_columns):
+                print(f"WARNING: Row value count ({1 + len(v_f1) + len(v_f2)}) does not match column count ({len(self.grid_columns)}) for row: {[source] + list(v_f1[:4])}...")
                 continue # Skip this row to prevent Treeview errors
 
-            self.grid.insert('', 'end', values=values)
-            inserted_count += 1
-            # Apply the display_limit here for the actual grid insertion
-            if inserted_count >= display_limit:
+            rows.append(gc)
+            if len(rows) >= display_limit:
                 break
-        print(f"DEBUG: Total rows inserted into grid: {inserted_count}")
+
+        # The grid pulls only the rows of its visible window from here while scrolling
+        def row_at(i):
+            source, v_f1, v_f2, _, cell_diff_map = rows[i]
+            return [source] + list(v_f1) + list(v_f2), cell_diff_map
+
+        self.grid.set_rows(len(rows), row_at)
+        print(f"DEBUG: Total rows available to the grid: {len(rows)}")
 
     def clear_results(self):
         """Clears the search value, grid, and match count label."""
@@ -661,15 +2219,17 @@ class MappingSearchSBSApp:
         self.clear_grid()
         self.match_count_label.config(text="Matching: 0 | Non-matching: 0")
         self.grid_content = [] # Also clear the underlying data
+        self.grid_positions = None
 
     def clear_grid(self):
-        """Removes all items from the Treeview grid."""
-        for item in self.grid.get_children():
-            self.grid.delete(item)
+        """Removes all rows from the Treeview grid."""
+        self.grid.set_rows(0, None)
 
-    def export_to_excel(self, only_matches=True):
+    def export_to_excel(self, only_matches=True, differences_only=False):
         """
         Exports the current grid content (filtered by matches/non-matches) to an Excel file.
+        With differences_only, exports the matched rows whose compared columns differ,
+        listing the differing columns.
         """
         if not self.grid_content:
             messagebox.showerror("Export Error", "No data in grid to export.")
@@ -682,25 +2242,35 @@ class MappingSearchSBSApp:
         def format_cell_value_for_export(val):
             return str(val).strip() if pd.notna(val) else ''
 
-        for gc in self.grid_content:
+        if differences_only:
+            columns_to_export = self.grid_columns + ['Differing Columns']
+
+        exported_rows = [] # Index of each exported row in grid_content
+        for i, gc in enumerate(self.grid_content):
             source, v_f1, v_f2, is_match, cell_diff_map = gc
-            if only_matches and is_match:
+            if differences_only:
+                if is_match and cell_diff_map:
+                    formatted_v_f1 = [format_cell_value_for_export(val) for val in v_f1]
+                    formatted_v_f2 = [format_cell_value_for_export(val) for val in v_f2]
+                    data_to_export.append([source] + formatted_v_f1 + formatted_v_f2 + [", ".join(cell_diff_map)])
+                    exported_rows.append(i)
+            elif only_matches and is_match:
                 # Apply NaN removal for export as well
                 formatted_v_f1 = [format_cell_value_for_export(val) for val in v_f1]
                 formatted_v_f2 = [format_cell_value_for_export(val) for val in v_f2]
                 data_to_export.append([source] + formatted_v_f1 + formatted_v_f2)
+                exported_rows.append(i)
             elif not only_matches and not is_match:
                 # Apply NaN removal for export as well
                 formatted_v_f1 = [format_cell_value_for_export(val) for val in v_f1]
                 formatted_v_f2 = [format_cell_value_for_export(val) for val in v_f2]
                 data_to_export.append([source] + formatted_v_f1 + formatted_v_f2)
+                exported_rows.append(i)
         
         if not data_to_export:
             messagebox.showinfo("Export", "No records to export based on current filters.")
             return
         
-        df_export = pd.DataFrame(data_to_export, columns=columns_to_export)
-        
         export_path = filedialog.asksaveasfilename(
             title="Export Grid to Excel",
             defaultextension=".xlsx",
@@ -708,11 +2278,41 @@ class MappingSearchSBSApp:
         )
         
         if export_path:
-            try:
-                df_export.to_excel(export_path, index=False)
-                messagebox.showinfo("Exported", f"Grid exported to {export_path}")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export: {e}")
+            # Columns a projected load skipped are read back from the files by row position
+            projected = [(side, path) for side, path in ((0, self.projected_file1), (1, self.projected_file2)) if path]
+            if self.grid_positions is None:
+                projected = []
+            grid_positions = self.grid_positions
+            n1, n2 = len(self.grid_content[0][1]), len(self.grid_content[0][2])
+            names = [[c[len("File1_"):] for c in self.grid_columns[1:1 + n1]], [c[len("File2_"):] for c in self.grid_columns[1 + n1:]]]
+
+            # Rows are written in slices so the export reports progress and can be cancelled
+            def export(progress):
+                nonlocal data_to_export, columns_to_export
+                if projected:
+                    sides = [[row[1:1 + n1] for row in data_to_export], [row[1 + n1:1 + n1 + n2] for row in data_to_export]]
+                    for side, path in projected:
+                        progress.report(f"Reading File {side + 1} columns")
+                        positions = grid_positions[side][exported_rows]
+                        rows_at = read_rows_at(path, positions)
+                        sides[side] = format_display_rows(rows_at, rows_at.index.get_indexer(positions))
+                        names[side] = list(rows_at.columns)
+                    data_to_export = [[row[0]] + r1 + r2 + row[1 + n1 + n2:] for row, r1, r2 in zip(data_to_export, sides[0], sides[1])]
+                    columns_to_export = (['Source'] + [f"File1_{h}" for h in names[0]] + [f"File2_{h}" for h in names[1]]
+                                         + columns_to_export[1 + n1 + n2:])
+                writer = StreamingResultWriter(export_path, columns_to_export)
+                try:
+                    for start in range(0, len(data_to_export), CHUNKSIZE):
+                        progress.report("Writing rows", start, len(data_to_export))
+                        writer.write_rows(data_to_export[start:start + CHUNKSIZE])
+                    progress.report("Saving file", len(data_to_export), len(data_to_export))
+                except TaskCancelled:
+                    writer.close()
+                    os.remove(export_path)
+                    raise
+                writer.close()
+
+            self.run_in_background("Export", export, lambda _: messagebox.showinfo("Exported", f"Grid exported to {export_path}"))
 
     def load_full_files(self):
         """
@@ -731,51 +2331,106 @@ class MappingSearchSBSApp:
             if size1 > 200*1024*1024 or size2 > 200*1024*1024: # 200 MB
                 response = messagebox.askyesno(
                     "Memory Warning",
-                    "One or both files are very large (>200MB). Loading full files may consume significant memory and could crash the application. Do you want to proceed?"
+                    "One or both files are very large (>200MB). Loading full files may consume significant memory and could crash the application. "
+                    "The Disk-backed comparison engine can compare such files without loading them. Do you want to proceed?"
                 )
                 if not response:
                     return
 
-            # Read full files based on extension
+            # Check the extensions before handing the reads to the background executor
             ext1 = os.path.splitext(self.loaded_file1)[1].lower()
             ext2 = os.path.splitext(self.loaded_file2)[1].lower()
-
-            if ext1 == ".csv":
-                self.df1 = pd.read_csv(self.loaded_file1, dtype=str)
-            elif ext1 == ".xlsx":
-                self.df1 = pd.read_excel(self.loaded_file1, dtype=str)
-            elif ext1 == ".txt":
-                try:
-                    self.df1 = pd.read_csv(self.loaded_file1, dtype=str)
-                except Exception:
-                    self.df1 = pd.read_csv(self.loaded_file1, sep="\t", dtype=str)
-            else:
+            if ext1 not in (".csv", ".xlsx", ".txt"):
                 messagebox.showerror("Error", f"Unsupported file extension for File 1: {ext1}")
                 return
-
-            if ext2 == ".csv":
-                self.df2 = pd.read_csv(self.loaded_file2, dtype=str)
-            elif ext2 == ".xlsx":
-                self.df2 = pd.read_excel(self.loaded_file2, dtype=str)
-            elif ext2 == ".txt":
-                try:
-                    self.df2 = pd.read_csv(self.loaded_file2, dtype=str)
-                except Exception:
-                    self.df2 = pd.read_csv(self.loaded_file2, sep="\t", dtype=str)
-            else:
+            if ext2 not in (".csv", ".xlsx", ".txt"):
                 messagebox.showerror("Error", f"Unsupported file extension for File 2: {ext2}")
                 return
-            
-            self.headers1 = list(self.df1.columns)
-            self.headers2 = list(self.df2.columns)
-            messagebox.showinfo("Full Load Complete", "Full files loaded into memory. You may now run export for all rows.")
-            
-            # After loading full files, it's good practice to re-map columns
-            # as headers might differ slightly if preview was truncated
-            self.reload_headers() 
-
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load full files: {e}")
+            return
+
+        path1, path2 = self.loaded_file1, self.loaded_file2
+        # With payload columns chosen, only those plus the mapped key and search columns are read
+        search_field = self.mapfield_combo.get()
+        required1 = [row[0].get() for row in self.mapping_rows if row[0].get()] + [search_field]
+        required2 = [row[1].get() for row in self.mapping_rows if row[1].get()] + [search_field]
+        usecols1 = projected_columns(self.headers1, required1, self.payload_columns1)
+        usecols2 = projected_columns(self.headers2, required2, self.payload_columns2)
+
+        def load(progress):
+            # The two files are independent, so they are read at the same time
+            return tuple(run_concurrently(progress, [
+                ("File 1", lambda report: read_full_file(path1, report, "Loading File 1", usecols1, self.sidecar_cache)),
+                ("File 2", lambda report: read_full_file(path2, report, "Loading File 2", usecols2, self.sidecar_cache)),
+            ]))
+
+        def loaded(frames):
+            self.df1, self.df2 = frames
+            self.source_file1, self.source_file2 = path1, path2
+            self.df1.columns = [str(c) for c in self.df1.columns]
+            self.df2.columns = [str(c) for c in self.df2.columns]
+            self.projected_file1 = path1 if usecols1 is not None else None
+            self.projected_file2 = path2 if usecols2 is not None else None
+            # Mappings made on the preview stay valid; only set them up if headers were never loaded
+            if not self.mapping_rows:
+                self.headers1, self.headers2 = list(self.df1.columns), list(self.df2.columns)
+                self.init_mapping()
+            messagebox.showinfo("Full Load Complete", "Full files loaded into memory. You may now run export for all rows.")
+
+        self.run_in_background("Loading full files", load, loaded)
+
+    def add_missing_columns(self, df, path, headers, needed, progress, phase):
+        """
+        Returns df with those needed columns that a projected load skipped read
+        from path and added in file order; df itself when nothing is missing.
+        """
+        missing = [c for c in dict.fromkeys(needed) if c in headers and c not in df.columns]
+        if not missing:
+            return df
+        extra = read_full_file(path, progress.report, phase, missing, self.sidecar_cache)
+        df = df.assign(**{c: extra[c].to_numpy() for c in missing})
+        return df[[h for h in headers if h in df.columns]]
+
+    def choose_payload_columns(self):
+        """
+        Lets the user pick, per file, the columns "Load Full File" reads besides
+        the mapped key and search columns. Leaving every column selected loads
+        whole files as before; unloaded columns are read back from the files
+        when exporting.
+        """
+        if not self.headers1 or not self.headers2:
+            messagebox.showerror("Error", "Please load headers first.")
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Columns to Load")
+        dialog.transient(self.root)
+        listboxes = []
+        for i, (headers, payload) in enumerate([(self.headers1, self.payload_columns1), (self.headers2, self.payload_columns2)]):
+            frame = tk.LabelFrame(dialog, text=f"File {i + 1} columns", font=('Arial', 10, 'bold'))
+            frame.grid(row=0, column=i, padx=8, pady=8, sticky="nsew")
+            listbox = tk.Listbox(frame, selectmode="multiple", exportselection=False, height=15, width=35)
+            scroll = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+            listbox.configure(yscrollcommand=scroll.set)
+            listbox.pack(side="left", fill="both", expand=True)
+            scroll.pack(side="right", fill="y")
+            for j, h in enumerate(headers):
+                listbox.insert(tk.END, h)
+                if payload is None or h in payload:
+                    listbox.selection_set(j)
+            listboxes.append((listbox, headers))
+
+        def apply():
+            chosen = []
+            for listbox, headers in listboxes:
+                selected = [headers[j] for j in listbox.curselection()]
+                chosen.append(None if len(selected) == len(headers) else selected)
+            self.payload_columns1, self.payload_columns2 = chosen
+            dialog.destroy()
+
+        tk.Label(dialog, text="Mapped key and search columns are always loaded.").grid(row=1, column=0, columnspan=2, padx=8, sticky="w")
+        tk.Button(dialog, text="OK", command=apply, width=10).grid(row=2, column=0, pady=8)
+        tk.Button(dialog, text="Cancel", command=dialog.destroy, width=10).grid(row=2, column=1, pady=8)
 
 if __name__ == "__main__":
     root = tk.Tk()
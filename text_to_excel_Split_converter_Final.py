@@ -1,11 +1,562 @@
 import pandas as pd
+import numpy as np
 import tkinter as tk
 from tkinter import filedialog, messagebox, LabelFrame, Checkbutton, BooleanVar, Canvas, Scrollbar, ttk, Listbox
 import os
+import csv
+import glob
+import itertools
+import hashlib
+import importlib.util
+import tempfile
+import shutil
+import time
 import webbrowser
-from openpyxl import load_workbook
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 import re
 import platform
+from datetime import date, datetime
+# calamine lets pd.read_excel use its much faster engine; None is pandas' default engine (openpyxl)
+XLSX_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+try:
+    import xlsxwriter # Fast streaming xlsx writer for Stage 2 splits
+except ImportError:
+    xlsxwriter = None # Splits are written with openpyxl
+try:
+    import pyarrow as pa # Arrow IPC files share the split's columns with worker processes
+except ImportError:
+    pa = None # Stage 2 groups are all written in this process
+
+# Largest total size of the Parquet sidecar copies kept by SidecarCache
+SIDECAR_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Rows an Excel sheet can hold
+EXCEL_MAX_ROWS = 1048576
+# Strings read as missing values, the same as pd.read_csv's and pd.read_excel's defaults
+CSV_NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+                 "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+# Most spill files a split by column value keeps open at once
+MAX_OPEN_PARTITIONS = 64
+# Report a Stage 1 batch writes to its output folder, never read back as an input
+BATCH_SUMMARY_NAME = "batch_summary.csv"
+
+def read_excel_sheet(path, usecols=None):
+    """
+    Reads the whole first sheet of an xlsx file as str columns with
+    XLSX_ENGINE. Calamine parses the sheet natively and is several times
+    faster than openpyxl on large sheets, but it always parses the whole
+    sheet, so previews and header reads stay on openpyxl.
+
+    Columns are named as _excel_header names them, so a numeric header such as
+    2024 is the column "2024", and usecols is matched against those names.
+    Raises ValueError when some of usecols are not in the header row.
+    """
+    # Selecting by name after the read costs nothing extra, as the whole sheet is parsed anyway
+    df = pd.read_excel(path, sheet_name=0, dtype=str, engine=XLSX_ENGINE)
+    df.columns = [str(column) for column in df.columns]
+    if usecols is None:
+        return df
+    missing = [column for column in usecols if column not in df.columns]
+    if missing:
+        raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+    return df[[column for column in df.columns if column in usecols]]
+
+def _excel_cell_to_str(value, na_filter=True):
+    """
+    Converts an openpyxl cell value the way pd.read_excel(dtype=str) does:
+    blank cells and, with na_filter, the CSV_NA_VALUES strings become NaN.
+    """
+    if value is None or na_filter and isinstance(value, str) and value in CSV_NA_VALUES:
+        return np.nan
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def _excel_header(header):
+    """
+    Column names for an xlsx header row as pd.read_excel names them: blank
+    cells become "Unnamed: i" and repeated names get ".1", ".2", ... suffixes.
+    """
+    names = [_excel_cell_to_str(h, na_filter=False) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def iter_excel_sheet(path, usecols=None):
+    """
+    Streams the first sheet of an xlsx file. Yields the column names (only
+    usecols when given), then the values of those columns for each row as
+    str or None, converted the way pd.read_excel(dtype=str) does. The rows
+    are read with calamine when it is installed and with openpyxl's
+    read-only mode otherwise, and every other cell is dropped as it is read.
+    Raises ValueError when some of usecols are not in the header row.
+    """
+    wb = None
+    if XLSX_ENGINE == "calamine":
+        from python_calamine import CalamineWorkbook
+        sheet = CalamineWorkbook.from_path(path).get_sheet_by_index(0)
+        # calamine starts rows at the first used column and marks blank cells with ""
+        offset, blank, rows = (sheet.start[1] if sheet.start else 0), "", sheet.iter_rows()
+    else:
+        wb = load_workbook(path, read_only=True, data_only=True)
+        offset, blank, rows = 0, None, wb.worksheets[0].iter_rows(values_only=True)
+    def to_str(row, i):
+        value = row[i] if 0 <= i < len(row) else blank
+        if value == blank:
+            return None
+        if type(value) is date:
+            return str(datetime(value.year, value.month, value.day))
+        value = _excel_cell_to_str(value)
+        return None if value is np.nan else value
+
+    try:
+        header = next(rows, None)
+        header = [None] * offset + [None if value == blank else value for value in header] if header is not None else []
+        columns = _excel_header(header)
+        if usecols is None:
+            usecols = columns
+        missing = [column for column in usecols if column not in columns]
+        if missing:
+            raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+        positions = [columns.index(column) - offset for column in usecols]
+        yield list(usecols)
+        blank_rows = 0 # Empty rows are only kept if data follows them, like pd.read_excel
+        for row in rows:
+            if row.count(blank) == len(row):
+                blank_rows += 1
+                continue
+            for _ in range(blank_rows):
+                yield [None] * len(positions)
+            blank_rows = 0
+            yield [to_str(row, i) for i in positions]
+    finally:
+        if wb is not None:
+            wb.close()
+
+def read_excel_header(path):
+    """
+    Returns the column names of the first sheet of an xlsx file, reading only
+    its first row. The names are the ones iter_excel_sheet and read_excel_sheet
+    give the columns, so a numeric header such as 2024 is "2024".
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        header = next(wb.worksheets[0].iter_rows(values_only=True), ())
+    finally:
+        wb.close()
+    return _excel_header(header)
+
+def read_excel_columns(path, usecols):
+    """
+    Reads only the usecols columns of the first sheet of an xlsx file as str
+    columns, streaming the sheet with iter_excel_sheet so that time and
+    memory scale with the columns kept rather than with the sheet's width.
+    """
+    rows = iter_excel_sheet(path, usecols)
+    columns = next(rows)
+    data = [[] for _ in columns]
+    for row in rows:
+        for values, value in zip(data, row):
+            values.append(value)
+    return pd.DataFrame(dict(zip(columns, data)), dtype=str)
+
+def user_cache_dir(name):
+    """
+    Returns the directory for the named on-disk cache, private to the current
+    user: under %LOCALAPPDATA% on Windows and $XDG_CACHE_HOME or ~/.cache
+    elsewhere, instead of a temp directory other users can write to.
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, name)
+
+class SidecarCache:
+    """
+    On-disk Parquet copies of fully parsed input files, so reopening an
+    unchanged file reads the compressed columnar copy instead of parsing the
+    CSV or xlsx again. An entry is identified by the file's path, size and
+    mtime, so a changed file simply gets a new entry. The directory is kept
+    under max_bytes by removing the least recently used entries.
+    """
+    def __init__(self, cache_dir=None, max_bytes=SIDECAR_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or user_cache_dir("input_sidecar_cache")
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        ident = repr((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+        return os.path.join(self.cache_dir, hashlib.sha1(ident.encode("utf-8")).hexdigest() + ".parquet")
+
+    def read(self, path, parse, usecols=None):
+        """
+        Returns the str columns of path (only usecols when given) from its
+        Parquet copy when there is one, and parse(usecols) otherwise. A parse
+        of every column is stored for next time.
+        """
+        entry = self._entry_path(path)
+        if entry and os.path.exists(entry):
+            try:
+                df = pd.read_parquet(entry, columns=usecols)
+                os.utime(entry) # Marks the entry as recently used
+                print(f"DEBUG: Sidecar cache hit for {path}")
+                return df
+            except (OSError, ValueError, ImportError) as e:
+                print(f"DEBUG: Could not read sidecar cache for {path}: {e}")
+
+        df = parse(usecols)
+        if entry and usecols is None:
+            self._store(entry, df)
+        return df
+
+    def _store(self, entry, df):
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            df.to_parquet(entry + ".tmp", index=False, compression="zstd")
+            os.replace(entry + ".tmp", entry)
+        except (OSError, ValueError, ImportError) as e:
+            # e.g. no Parquet engine installed, or column names Parquet cannot store
+            print(f"DEBUG: Could not write sidecar cache {entry}: {e}")
+            if os.path.exists(entry + ".tmp"):
+                os.remove(entry + ".tmp")
+            return
+        self._evict(keep=entry)
+
+    def _evict(self, keep):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, os.path.join(self.cache_dir, name)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+
+def split_text_line(line, delimiter):
+    """Splits one line on a multi-character delimiter, removing quotes around cells."""
+    return [cell.strip('"') for cell in line.strip().split(delimiter)]
+
+def strip_record(record):
+    """Trims whitespace at both ends of a parsed record, as stripping its line did."""
+    if record:
+        record[0] = record[0].lstrip()
+        record[-1] = record[-1].rstrip()
+    return record
+
+def iter_text_rows(input_file, delimiter, skip_first_last=False):
+    """
+    Yields the cells of each record of a delimited text file, reading it as a
+    stream. A single-character delimiter is handled by the csv module's C
+    tokenizer, so a quoted cell may contain the delimiter, quotes ("") or line
+    breaks; longer delimiters are split line by line. With skip_first_last the
+    first and last records (header and trailer) are dropped; one record of
+    lookahead tells the last record apart.
+    """
+    with open(input_file, "r", encoding="utf-8", newline="") as f:
+        if len(delimiter) == 1:
+            records = map(strip_record, csv.reader(f, delimiter=delimiter))
+        else:
+            records = (split_text_line(line, delimiter) for line in f)
+        if skip_first_last:
+            next(records, None)
+        previous = next(records, None)
+        for record in records:
+            yield previous
+            previous = record
+        if previous is not None and not skip_first_last:
+            yield previous
+
+def numbered_output_path(output_file, number):
+    """Returns output_file for part 1 and "name_<number>.xlsx" beside it for later parts."""
+    if number == 1:
+        return output_file
+    base, ext = os.path.splitext(output_file)
+    return f"{base}_{number}{ext}"
+
+def write_rows_to_excel(rows, output_file, max_rows=EXCEL_MAX_ROWS, rollover="sheet", header_row=True):
+    """
+    Writes rows to a new xlsx file with openpyxl's write-only mode, which
+    streams them to disk instead of building the sheet in memory. Once a sheet
+    holds max_rows rows, writing continues on a new sheet ("sheet") or in a new
+    numbered workbook ("workbook"), starting with the first row repeated as its
+    header when header_row says the first row is one. Returns (rows written,
+    paths of the workbooks written, sheet count).
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    paths = [output_file]
+    header = None
+    row_count = 0
+    sheet_rows = 0
+    sheet_count = 1
+    for row in rows:
+        if header is None and header_row:
+            header = row
+        elif sheet_rows >= max_rows:
+            if rollover == "workbook":
+                wb.save(paths[-1])
+                paths.append(numbered_output_path(output_file, len(paths) + 1))
+                wb = Workbook(write_only=True)
+                ws = wb.create_sheet("Sheet1")
+            else:
+                ws = wb.create_sheet(f"Sheet{len(wb.worksheets) + 1}")
+            sheet_count += 1
+            sheet_rows = 0
+            if header is not None:
+                ws.append(header)
+                sheet_rows = 1
+        ws.append(row)
+        row_count += 1
+        sheet_rows += 1
+    wb.save(paths[-1])
+    return row_count, paths, sheet_count
+
+def convert_text_file(input_file, output_file, delimiter, skip_first_last=False, max_rows=EXCEL_MAX_ROWS, rollover="sheet"):
+    """
+    Converts a delimited text file to xlsx, see iter_text_rows and
+    write_rows_to_excel, and returns write_rows_to_excel's result. With
+    skip_first_last the header record is dropped, so no row is repeated as a
+    header on later sheets. Raises ValueError when skip_first_last leaves no
+    rows to write.
+    """
+    rows = iter_text_rows(input_file, delimiter, skip_first_last)
+    first_row = next(rows, None)
+    if first_row is None and skip_first_last:
+        raise ValueError("Not enough lines in the text file.")
+    if first_row is not None:
+        rows = itertools.chain([first_row], rows)
+    return write_rows_to_excel(rows, output_file, max_rows, rollover, header_row=not skip_first_last)
+
+def batch_input_files(pattern):
+    """
+    Returns the files matched by a glob pattern, or the .txt and .csv files of
+    a folder, leaving out the summary of an earlier batch.
+    """
+    if os.path.isdir(pattern):
+        files = [os.path.join(pattern, name) for name in os.listdir(pattern) if name.lower().endswith((".txt", ".csv"))]
+    else:
+        files = glob.glob(pattern)
+    return sorted(f for f in files if os.path.isfile(f) and os.path.basename(f) != BATCH_SUMMARY_NAME)
+
+def convert_batch_file(input_file, output_file, delimiter, skip_first_last, max_rows, rollover):
+    """
+    Batch worker, run in a separate process: converts one file and returns
+    (input file, rows written, input bytes, seconds, error message or "").
+    """
+    started = time.perf_counter()
+    row_count, error = 0, ""
+    try:
+        row_count = convert_text_file(input_file, output_file, delimiter, skip_first_last, max_rows, rollover)[0]
+    except Exception as e:
+        error = str(e)
+    size = os.path.getsize(input_file) if os.path.exists(input_file) else 0
+    return input_file, row_count, size, round(time.perf_counter() - started, 2), error
+
+def conversion_summary(output_file, row_count, paths, sheet_count):
+    """The Stage 1 success message for the result of write_rows_to_excel."""
+    if len(paths) > 1:
+        return f"{row_count:,} rows converted into {len(paths)} workbooks:\n" + "\n".join(paths)
+    if sheet_count > 1:
+        return f"{row_count:,} rows converted into {sheet_count} sheets and saved to {output_file}"
+    return f"File converted and saved to {output_file}"
+
+def open_text_sheet(path, header):
+    """
+    Starts a workbook at path with one streamed sheet whose cells, header
+    included, are all formatted as text ("@") as they are written. Returns
+    (append, close): append(values) writes the next row, None for blank
+    cells, and close() saves the file. Uses XlsxWriter's constant-memory mode
+    when it is installed, and openpyxl's slower write-only mode otherwise.
+    """
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+        ws = wb.add_worksheet("Sheet1")
+        text_format = wb.add_format({"num_format": "@"})
+        next_row = itertools.count()
+
+        def append(values):
+            ws.write_row(next(next_row), 0, values, text_format)
+        close = wb.close
+    else:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+
+        def append(values):
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(ws, value)
+                cell.number_format = "@"
+                cells.append(cell)
+            ws.append(cells)
+
+        def close():
+            wb.save(path)
+    append(header)
+    return append, close
+
+def write_column_groups(df, groups, output_folder):
+    """
+    Writes each (output file name, columns) group of df to "<name>.xlsx" in
+    output_folder, all in one pass over the rows of df, with open_text_sheet
+    formatting every cell as text as it is written, so no workbook is
+    reopened. Returns {name: error} for the groups that could not be saved.
+    """
+    writers = []
+    for name, columns in groups:
+        append, close = open_text_sheet(os.path.join(output_folder, f"{name}.xlsx"), columns)
+        writers.append((name, append, close, [df.columns.get_loc(column) for column in columns]))
+
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+        for name, append, close, positions in writers:
+            append([row[i] for i in positions])
+
+    errors = {}
+    for name, append, close, positions in writers:
+        try:
+            close()
+        except Exception as e:
+            errors[name] = str(e)
+    return errors
+
+def write_group_from_ipc(ipc_path, name, columns, positions, output_folder):
+    """
+    Process-pool worker: memory-maps the Arrow IPC copy of the source sheet,
+    takes the group's columns by position and writes them to "<name>.xlsx".
+    Only the file path and the group definition cross the process boundary.
+    Returns {name: error} like write_column_groups.
+    """
+    with pa.memory_map(ipc_path) as source:
+        table = pa.ipc.open_file(source).read_all().select([f"c{i}" for i in positions])
+        df = table.to_pandas()
+    df.columns = columns
+    return write_column_groups(df, [(name, columns)], output_folder)
+
+def write_column_groups_parallel(df, groups, output_folder, workers=None):
+    """
+    Multi-core variant of write_column_groups. The source sheet is written
+    once to a temporary Arrow IPC file, and a process pool writes one group
+    per task from a memory map of it, largest groups first, so the split
+    takes about as long as its largest group. Falls back to
+    write_column_groups without pyarrow, with one worker, or with one group.
+    """
+    workers = min(max(1, workers or os.cpu_count() or 1), len(groups))
+    if pa is None or workers <= 1:
+        return write_column_groups(df, groups, output_folder)
+
+    table = pa.Table.from_pandas(df.set_axis([f"c{i}" for i in range(len(df.columns))], axis=1), preserve_index=False)
+    fd, ipc_path = tempfile.mkstemp(suffix=".arrow")
+    os.close(fd)
+    errors = {}
+    try:
+        with pa.OSFile(ipc_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(write_group_from_ipc, ipc_path, name, columns,
+                                   [df.columns.get_loc(column) for column in columns], output_folder): name
+                       for name, columns in sorted(groups, key=lambda group: -len(group[1]))}
+            for future in as_completed(futures):
+                try:
+                    errors.update(future.result())
+                except Exception as e:
+                    errors[futures[future]] = str(e)
+    finally:
+        os.remove(ipc_path)
+    return errors
+
+def partition_file_name(column, value, used):
+    """
+    Returns a file name (without .xlsx) for the rows whose column holds value,
+    cleaned like the column group names and made unique among used, ignoring
+    case, since Windows file names are case-insensitive.
+    """
+    name = re.sub(r'[^\w\s.-]', '', f"{column}_{'blank' if value is None else value}")
+    name = name.replace(' ', '_')[:100]
+    unique, number = name, 1
+    while unique.lower() in used:
+        number += 1
+        unique = f"{name}_{number}"
+    used.add(unique.lower())
+    return unique
+
+def split_by_column_value(path, column, output_folder, max_open=MAX_OPEN_PARTITIONS):
+    """
+    Writes the rows of the first sheet of path to one workbook per value of
+    column, named by partition_file_name, in a single pass over the sheet.
+    Each row is appended to a CSV spill file for its value. At most max_open
+    spill files are open at once: the least recently used one is flushed and
+    closed to make room, so file handles and memory stay bounded however
+    many distinct values there are. Each spill file is then streamed into
+    its workbook with open_text_sheet. Returns a list of (value, output
+    path, row count, error) in order of first appearance.
+    """
+    rows = iter_excel_sheet(path)
+    header = next(rows)
+    if column not in header:
+        raise ValueError(f"Column '{column}' not found in the first sheet.")
+    key = header.index(column)
+    spill_dir = tempfile.mkdtemp(prefix="value_split_")
+    spills = {} # value -> [spill path, row count]
+    open_files = {} # value -> (file, csv writer), least recently used first
+    try:
+        for row in rows:
+            value = row[key]
+            entry = open_files.pop(value, None)
+            if entry is None:
+                if len(open_files) >= max_open:
+                    open_files.pop(next(iter(open_files)))[0].close()
+                if value not in spills:
+                    spills[value] = [os.path.join(spill_dir, f"{len(spills)}.csv"), 0]
+                f = open(spills[value][0], "a", newline="", encoding="utf-8")
+                entry = (f, csv.writer(f))
+            open_files[value] = entry
+            entry[1].writerow(row)
+            spills[value][1] += 1
+        for f, _ in open_files.values():
+            f.close()
+        open_files.clear()
+
+        results = []
+        used = set()
+        for value, (spill, row_count) in spills.items():
+            output_file = os.path.join(output_folder, partition_file_name(column, value, used) + ".xlsx")
+            try:
+                append, close = open_text_sheet(output_file, header)
+                with open(spill, newline="", encoding="utf-8") as f:
+                    for record in csv.reader(f):
+                        append([cell if cell != "" else None for cell in record])
+                close()
+                error = None
+            except Exception as e:
+                error = str(e)
+            results.append((value, output_file, row_count, error))
+            os.remove(spill)
+    finally:
+        for f, _ in open_files.values():
+            f.close()
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    return results
 
 class ExcelToolApp:
     def __init__(self, root):
@@ -78,8 +629,19 @@ class ExcelToolApp:
         self.delimiter_entry.insert(0, ",")
         self.delimiter_entry.grid(row=2, column=1, sticky="w", pady=5)
 
+        tk.Label(self.frame_stage1, text="Rows per Sheet:").grid(row=3, column=0, sticky="e", pady=5)
+        rollover_frame = tk.Frame(self.frame_stage1)
+        rollover_frame.grid(row=3, column=1, columnspan=2, sticky="w", pady=5)
+        self.rows_per_sheet_entry = tk.Entry(rollover_frame, width=10)
+        self.rows_per_sheet_entry.insert(0, str(EXCEL_MAX_ROWS))
+        self.rows_per_sheet_entry.pack(side="left")
+        tk.Label(rollover_frame, text="then continue in a new").pack(side="left", padx=(10, 5))
+        self.rollover_var = tk.StringVar(value="sheet")
+        tk.Radiobutton(rollover_frame, text="Sheet", variable=self.rollover_var, value="sheet").pack(side="left")
+        tk.Radiobutton(rollover_frame, text="Workbook", variable=self.rollover_var, value="workbook").pack(side="left")
+
         stage1_button_frame = tk.Frame(self.frame_stage1)
-        stage1_button_frame.grid(row=3, column=0, columnspan=3, pady=15)
+        stage1_button_frame.grid(row=4, column=0, columnspan=3, pady=15)
         stage1_button_frame.columnconfigure(0, weight=1)
         stage1_button_frame.columnconfigure(1, weight=1)
 
@@ -103,10 +665,35 @@ class ExcelToolApp:
         )
         self.convert_full_button.grid(row=0, column=1, padx=5)
 
+        self.batch_frame = LabelFrame(self.frame_stage1, text="Batch Conversion", padx=10, pady=5)
+        self.batch_frame.grid(row=5, column=0, columnspan=3, sticky="ew", pady=(0, 10))
+        tk.Label(self.batch_frame, text="Input Folder or Pattern:").grid(row=0, column=0, sticky="e", pady=5)
+        self.batch_input_entry = tk.Entry(self.batch_frame, width=40)
+        self.batch_input_entry.grid(row=0, column=1, sticky="ew", pady=5)
+        tk.Button(self.batch_frame, text="Browse...", command=self.select_batch_input_folder).grid(row=0, column=2, padx=5, pady=5)
+        tk.Label(self.batch_frame, text="Output Folder:").grid(row=1, column=0, sticky="e", pady=5)
+        self.batch_output_entry = tk.Entry(self.batch_frame, width=40)
+        self.batch_output_entry.grid(row=1, column=1, sticky="ew", pady=5)
+        tk.Button(self.batch_frame, text="Browse...", command=self.select_batch_output_folder).grid(row=1, column=2, padx=5, pady=5)
+        self.batch_skip_rows_var = BooleanVar(value=False)
+        Checkbutton(self.batch_frame, text="Skip 1st/Last Row", variable=self.batch_skip_rows_var).grid(row=2, column=1, sticky="w")
+        self.batch_convert_button = tk.Button(
+            self.batch_frame,
+            text="Batch Convert",
+            width=30,
+            bg="#0078D7",
+            fg="white",
+            command=self.run_stage1_batch_conversion
+        )
+        self.batch_convert_button.grid(row=3, column=0, columnspan=3, pady=5)
+        self.batch_status_label = tk.Label(self.batch_frame, text="")
+        self.batch_status_label.grid(row=4, column=0, columnspan=3)
+        self.batch_frame.columnconfigure(1, weight=1)
+
         self.frame_stage1.columnconfigure(1, weight=1)
 
         # --- Stage 2: Split Excel by Column Groups ---
-        self.frame_stage2 = LabelFrame(self.content_frame, text="Stage 2: Split Excel by Column Groups", padx=20, pady=10)
+        self.frame_stage2 = LabelFrame(self.content_frame, text="Stage 2: Split Excel by Column Groups or Values", padx=20, pady=10)
         self.frame_stage2.pack(pady=10, padx=20, fill="x", expand=True)
 
         tk.Label(self.frame_stage2, text="Input Excel File:").grid(row=0, column=0, sticky="e", pady=5)
@@ -189,6 +776,22 @@ class ExcelToolApp:
         )
         self.perform_split_button.grid(row=4, column=0, columnspan=3, pady=15)
 
+        split_value_frame = tk.Frame(self.frame_stage2)
+        split_value_frame.grid(row=5, column=0, columnspan=3, pady=(0, 15))
+        tk.Label(split_value_frame, text="Split by Values of Column:").grid(row=0, column=0, padx=5)
+        self.split_value_column_combobox = ttk.Combobox(split_value_frame, width=30, state="disabled")
+        self.split_value_column_combobox.grid(row=0, column=1, padx=5)
+        self.split_by_value_button = tk.Button(
+            split_value_frame,
+            text="Split by Value",
+            width=20,
+            bg="#28A745",
+            fg="white",
+            state=tk.DISABLED,
+            command=self.perform_value_split
+        )
+        self.split_by_value_button.grid(row=0, column=2, padx=5)
+
         self.dataiq_button_stage2 = tk.Button(
             self.frame_stage2,
             text="DataIQ",
@@ -197,7 +800,7 @@ class ExcelToolApp:
             fg="white",
             command=self.open_dataiq_url
         )
-        self.dataiq_button_stage2.grid(row=5, column=0, columnspan=3, pady=(0, 10))
+        self.dataiq_button_stage2.grid(row=6, column=0, columnspan=3, pady=(0, 10))
 
         self.frame_stage2.columnconfigure(1, weight=1)
         self.frame_stage2.rowconfigure(2, weight=1)
@@ -206,6 +809,7 @@ class ExcelToolApp:
         self.all_loaded_headers = []
         self.header_checkbox_vars = []
         self.editing_group_index = None
+        self.sidecar_cache = SidecarCache() # Parquet copies of input workbooks already parsed
 
         # --- Stage 3: Search Value in Excel Column ---
         self.frame_stage3 = LabelFrame(self.content_frame, text="Stage 3: Search Value in Excel Column", padx=20, pady=10)
@@ -284,10 +888,13 @@ class ExcelToolApp:
         if not delimiter:
             messagebox.showerror("Input Error", "Please provide a Delimiter.")
             return
+        max_rows = self.get_rows_per_sheet()
+        if max_rows is None:
+            return
         self.convert_single_button.config(state=tk.DISABLED)
         self.convert_full_button.config(state=tk.DISABLED)
         self.root.update_idletasks()
-        success, msg = self.convert_text_to_excel_skip_first_last(input_file, output_file, delimiter)
+        success, msg = self.convert_text_to_excel_skip_first_last(input_file, output_file, delimiter, max_rows, self.rollover_var.get())
         self.convert_single_button.config(state=tk.NORMAL)
         self.convert_full_button.config(state=tk.NORMAL)
         if success:
@@ -308,10 +915,13 @@ class ExcelToolApp:
         if not delimiter:
             messagebox.showerror("Input Error", "Please provide a Delimiter.")
             return
+        max_rows = self.get_rows_per_sheet()
+        if max_rows is None:
+            return
         self.convert_single_button.config(state=tk.DISABLED)
         self.convert_full_button.config(state=tk.DISABLED)
         self.root.update_idletasks()
-        success, msg = self.convert_text_to_excel_full(input_file, output_file, delimiter)
+        success, msg = self.convert_text_to_excel_full(input_file, output_file, delimiter, max_rows, self.rollover_var.get())
         self.convert_single_button.config(state=tk.NORMAL)
         self.convert_full_button.config(state=tk.NORMAL)
         if success:
@@ -319,33 +929,143 @@ class ExcelToolApp:
         else:
             messagebox.showerror("Stage 1 Failed", msg)
 
-    def convert_text_to_excel_skip_first_last(self, input_file, output_file, delimiter):
+    def get_rows_per_sheet(self):
+        """Returns the Stage 1 rows-per-sheet limit, or None after reporting an invalid entry."""
         try:
-            with open(input_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            if len(lines) <= 2:
-                return False, "Not enough lines in the text file."
-            lines = lines[1:-1]
-            rows = [line.strip().split(delimiter) for line in lines]
-            rows = [[cell.strip('"') for cell in row] for row in rows]
-            df = pd.DataFrame(rows)
-            df.to_excel(output_file, index=False, header=False)
-            return True, f"File converted and saved to {output_file}"
+            max_rows = int(self.rows_per_sheet_entry.get())
+        except ValueError:
+            max_rows = 0
+        if not 2 <= max_rows <= EXCEL_MAX_ROWS:
+            messagebox.showerror("Input Error", f"Rows per Sheet must be a whole number from 2 to {EXCEL_MAX_ROWS:,}.")
+            return None
+        return max_rows
+
+    def convert_text_to_excel_skip_first_last(self, input_file, output_file, delimiter, max_rows=EXCEL_MAX_ROWS, rollover="sheet"):
+        try:
+            result = convert_text_file(input_file, output_file, delimiter, True, max_rows, rollover)
+            return True, conversion_summary(output_file, *result)
         except Exception as e:
             return False, str(e)
 
-    def convert_text_to_excel_full(self, input_file, output_file, delimiter):
+    def convert_text_to_excel_full(self, input_file, output_file, delimiter, max_rows=EXCEL_MAX_ROWS, rollover="sheet"):
         try:
-            with open(input_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            rows = [line.strip().split(delimiter) for line in lines]
-            rows = [[cell.strip('"') for cell in row] for row in rows]
-            df = pd.DataFrame(rows)
-            df.to_excel(output_file, index=False, header=False)
-            return True, f"File converted and saved to {output_file}"
+            result = convert_text_file(input_file, output_file, delimiter, False, max_rows, rollover)
+            return True, conversion_summary(output_file, *result)
         except Exception as e:
             return False, str(e)
 
+    def select_batch_input_folder(self):
+        folder_path = filedialog.askdirectory(title="Select Folder of Text Files (Stage 1 Batch)")
+        if folder_path:
+            self.batch_input_entry.delete(0, tk.END)
+            self.batch_input_entry.insert(0, folder_path)
+
+    def select_batch_output_folder(self):
+        folder_path = filedialog.askdirectory(title="Select Output Folder (Stage 1 Batch)")
+        if folder_path:
+            self.batch_output_entry.delete(0, tk.END)
+            self.batch_output_entry.insert(0, folder_path)
+
+    def run_stage1_batch_conversion(self):
+        pattern = self.batch_input_entry.get()
+        output_folder = self.batch_output_entry.get()
+        delimiter = self.delimiter_entry.get()
+        if not pattern:
+            messagebox.showerror("Input Error", "Please select a folder or enter a file pattern for batch conversion.")
+            return
+        if not output_folder:
+            messagebox.showerror("Output Error", "Please select an Output Folder for batch conversion.")
+            return
+        if not delimiter:
+            messagebox.showerror("Input Error", "Please provide a Delimiter.")
+            return
+        max_rows = self.get_rows_per_sheet()
+        if max_rows is None:
+            return
+        input_files = batch_input_files(pattern)
+        if not input_files:
+            messagebox.showerror("Input Error", f"No text files found for: {pattern}")
+            return
+        try:
+            os.makedirs(output_folder, exist_ok=True)
+        except OSError as e:
+            messagebox.showerror("Output Error", f"Cannot create the output folder:\n{e}")
+            return
+
+        # One workbook per input file; same-named inputs (a.txt, a.csv) keep their extension in the name
+        stems = [os.path.splitext(os.path.basename(f))[0] for f in input_files]
+        output_files = []
+        for input_file, stem in zip(input_files, stems):
+            if stems.count(stem) > 1:
+                stem = f"{stem}_{os.path.splitext(input_file)[1].lstrip('.')}"
+            output_files.append(os.path.join(output_folder, f"{stem}.xlsx"))
+
+        skip_first_last = self.batch_skip_rows_var.get()
+        rollover = self.rollover_var.get()
+        self.batch_convert_button.config(state=tk.DISABLED)
+        started = time.perf_counter()
+        pool = None
+        try:
+            # Each file is converted in its own process, so the batch uses every core
+            pool = ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(input_files)))
+            futures = {pool.submit(convert_batch_file, input_file, output_file, delimiter, skip_first_last, max_rows, rollover): input_file
+                       for input_file, output_file in zip(input_files, output_files)}
+        except Exception as e:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.batch_convert_button.config(state=tk.NORMAL)
+            messagebox.showerror("Stage 1 Batch", f"Cannot start the batch conversion:\n{e}")
+            return
+        self.batch_status_label.config(text=f"Converted 0 of {len(input_files)} files...")
+        self.root.after(100, self.poll_stage1_batch_conversion, pool, futures, output_folder, started, [])
+
+    def poll_stage1_batch_conversion(self, pool, futures, output_folder, started, results):
+        """
+        Collects the finished conversions of a Stage 1 batch from the Tk loop,
+        so the window keeps responding while the pool works, and reports the
+        batch once every file is done. A file whose worker process died (the
+        pool is then broken) is reported as failed. However the batch ends,
+        the pool is shut down and the Convert button enabled again.
+        """
+        finished = True
+        try:
+            for future in [future for future in futures if future.done()]:
+                input_file = futures.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append((input_file, 0, 0, 0.0, str(e) or type(e).__name__))
+            if futures:
+                self.batch_status_label.config(text=f"Converted {len(results)} of {len(results) + len(futures)} files...")
+                self.root.after(100, self.poll_stage1_batch_conversion, pool, futures, output_folder, started, results)
+                finished = False
+        finally:
+            if finished:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self.batch_convert_button.config(state=tk.NORMAL)
+        if finished:
+            self.report_stage1_batch_conversion(results, output_folder, time.perf_counter() - started)
+
+    def report_stage1_batch_conversion(self, results, output_folder, elapsed):
+        """Writes BATCH_SUMMARY_NAME to the output folder and shows the outcome of a Stage 1 batch."""
+        results.sort()
+        summary_file = os.path.join(output_folder, BATCH_SUMMARY_NAME)
+        failed = [r for r in results if r[4]]
+        try:
+            with open(summary_file, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["File", "Rows", "Bytes", "Seconds", "Error"])
+                writer.writerows(results)
+        except OSError as e:
+            summary_file = f"(not written: {e})"
+        self.batch_status_label.config(text=f"Converted {len(results) - len(failed)} of {len(results)} files in {elapsed:.1f}s.")
+        msg = (f"Converted {len(results) - len(failed)} of {len(results)} files in {elapsed:.1f}s "
+               f"({sum(r[1] for r in results):,} rows, {sum(r[2] for r in results):,} bytes).\nSummary: {summary_file}")
+        if failed:
+            messagebox.showwarning("Stage 1 Batch", msg + "\n\nFailed:\n" + "\n".join(f"{os.path.basename(r[0])}: {r[4]}" for r in failed[:10]))
+        else:
+            messagebox.showinfo("Stage 1 Batch", msg)
+
     # --- Stage 2 methods (split, group management, scrollbars, etc.) ---
     def select_input_split_excel_file(self):
         file_path = filedialog.askopenfilename(
@@ -374,6 +1094,10 @@ class ExcelToolApp:
         self.edit_group_button.config(state=tk.DISABLED)
         self.remove_group_button.config(state=tk.DISABLED)
         self.perform_split_button.config(state=tk.DISABLED)
+        self.split_value_column_combobox.set('')
+        self.split_value_column_combobox['values'] = []
+        self.split_value_column_combobox.config(state="disabled")
+        self.split_by_value_button.config(state=tk.DISABLED)
         self.clear_defined_groups()
         self.clear_header_checkboxes()
         self.hide_group_definition_frame()
@@ -383,12 +1107,14 @@ class ExcelToolApp:
             messagebox.showwarning("File Not Found", f"Input Excel file not found: {input_excel_file}")
             return
         try:
-            headers_df = pd.read_excel(input_excel_file, sheet_name=0, nrows=0)
-            headers = headers_df.columns.tolist()
+            headers = read_excel_header(input_excel_file)
             if headers:
                 self.all_loaded_headers = headers
                 self.create_header_checkboxes(headers)
                 self.add_group_button.config(state=tk.NORMAL)
+                self.split_value_column_combobox['values'] = headers
+                self.split_value_column_combobox.config(state="readonly")
+                self.split_by_value_button.config(state=tk.NORMAL)
             else:
                 messagebox.showwarning("No Headers Found", f"Could not detect headers in the first sheet of Excel file: {input_excel_file}.\nCheck if the first row contains headers.")
         except Exception as e:
@@ -551,28 +1277,23 @@ class ExcelToolApp:
         self.dataiq_button_stage2.config(state=tk.DISABLED)
         self.root.update_idletasks()
         try:
-            df = pd.read_excel(input_excel_file, sheet_name=0, header=0, dtype=str)
-            split_count = 0
+            headers = read_excel_header(input_excel_file)
+            groups = []
             for output_file_name, columns_to_include in zip(output_file_names, column_groups_list):
+                missing_cols = [col for col in columns_to_include if col not in headers]
+                if missing_cols:
+                    messagebox.showwarning("Missing Columns", f"Skipping group for '{output_file_name}.xlsx' due to missing columns in the first sheet: {', '.join(missing_cols)}")
+                    continue
+                groups.append((output_file_name, columns_to_include))
+            # Only the columns some group uses are read from the sheet
+            usecols = list(dict.fromkeys(col for _, columns_to_include in groups for col in columns_to_include))
+            df = self.sidecar_cache.read(input_excel_file, lambda usecols: read_excel_columns(input_excel_file, usecols), usecols)
+            # The sheet was read once; each group is written by its own worker process, with the text format set as cells are written
+            save_errors = write_column_groups_parallel(df, groups, output_folder)
+            for output_file_name, save_error in save_errors.items():
                 output_file_path = os.path.join(output_folder, f"{output_file_name}.xlsx")
-                try:
-                    missing_cols = [col for col in columns_to_include if col not in df.columns]
-                    if missing_cols:
-                        messagebox.showwarning("Missing Columns", f"Skipping group for '{output_file_name}.xlsx' due to missing columns in the first sheet: {', '.join(missing_cols)}")
-                        continue
-                    df_subset = df[columns_to_include]
-                    df_subset.to_excel(output_file_path, index=False)
-                    if os.path.exists(output_file_path) and os.path.getsize(output_file_path) > 100:
-                        wb = load_workbook(output_file_path)
-                        ws = wb.active
-                        text_fmt = '@'
-                        for row in ws.iter_rows():
-                            for cell in row:
-                                cell.number_format = text_fmt
-                        wb.save(output_file_path)
-                    split_count += 1
-                except Exception as save_error:
-                    messagebox.showwarning("Save Error", f"Could not save group to '{output_file_path}': {save_error}")
+                messagebox.showwarning("Save Error", f"Could not save group to '{output_file_path}': {save_error}")
+            split_count = len(groups) - len(save_errors)
             if split_count > 0:
                 messagebox.showinfo("Split Success", f"Successfully split Excel file into {split_count} files in folder: {output_folder}")
             else:
@@ -595,6 +1316,47 @@ class ExcelToolApp:
                 self.perform_split_button.config(state=tk.NORMAL)
             self.split_groups_listbox.config(state=tk.NORMAL)
 
+    def perform_value_split(self):
+        input_excel_file = self.input_split_excel_entry.get()
+        output_folder = self.output_split_folder_entry.get()
+        column = self.split_value_column_combobox.get()
+        if not input_excel_file:
+            messagebox.showerror("Input Error", "Please select an Input Excel File (Stage 2).")
+            return
+        if not output_folder:
+            messagebox.showerror("Input Error", "Please specify an Output Folder (Stage 2).")
+            return
+        if not column:
+            messagebox.showwarning("Selection Error", "Please select the column whose values the split should follow.")
+            return
+        if not os.path.exists(output_folder):
+            try:
+                os.makedirs(output_folder)
+            except Exception as e:
+                messagebox.showerror("Folder Creation Error", f"Could not create output folder: {e}")
+                return
+        self.split_by_value_button.config(state=tk.DISABLED)
+        self.perform_split_button.config(state=tk.DISABLED)
+        self.root.update_idletasks()
+        try:
+            # One pass over the sheet; rows are routed to a spill file per value, then each becomes a workbook
+            results = split_by_column_value(input_excel_file, column, output_folder)
+            failed = [r for r in results if r[3]]
+            msg = (f"Split {sum(r[2] for r in results):,} rows into {len(results) - len(failed)} files "
+                   f"by the values of '{column}' in folder: {output_folder}")
+            if failed:
+                messagebox.showwarning("Split Completed", msg + "\n\nFailed:\n" + "\n".join(f"{os.path.basename(r[1])}: {r[3]}" for r in failed[:10]))
+            else:
+                messagebox.showinfo("Split Success", msg)
+        except FileNotFoundError:
+            messagebox.showerror("File Not Found", f"Input Excel file not found at {input_excel_file}")
+        except Exception as e:
+            messagebox.showerror("Split Failed", str(e))
+        finally:
+            self.split_by_value_button.config(state=tk.NORMAL)
+            if self.defined_column_groups:
+                self.perform_split_button.config(state=tk.NORMAL)
+
     # --- Stage 3 methods ---
     def load_search_excel_columns(self):
         input_excel_file = self.input_search_excel_entry.get()
@@ -615,8 +1377,7 @@ class ExcelToolApp:
             messagebox.showwarning("File Not Found", f"Input Excel file not found: {input_excel_file}")
             return
         try:
-            headers_df = pd.read_excel(input_excel_file, nrows=0)
-            headers = headers_df.columns.tolist()
+            headers = read_excel_header(input_excel_file)
             if headers:
                 self.search_column_combobox['values'] = headers
                 self.search_column_combobox.config(state="readonly")
@@ -668,7 +1429,7 @@ class ExcelToolApp:
             self.search_results_text.config(state="disabled")
             return
         try:
-            df = pd.read_excel(input_excel_file, dtype=str)
+            df = self.sidecar_cache.read(input_excel_file, lambda usecols: read_excel_sheet(input_excel_file, usecols))
             if selected_column not in df.columns:
                 messagebox.showerror("Column Error", f"Selected column '{selected_column}' not found in the Excel file.")
                 self.search_results_text.config(state="normal")